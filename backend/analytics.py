@@ -0,0 +1,266 @@
+import copy
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from plan_patch import apply_update, get_path
+
+# Cohort rollups: one plan_cohorts document per (age band, income band) holding
+# running sums, kept current by applying each plan write's change to them, so
+# reads never scan financial_plans. rebuild_cohorts recomputes them all with an
+# aggregation pipeline, which also repairs any drift from a write whose
+# rollup update failed.
+#
+# Saved plans keep only profile, protection, wealth, goals and
+# total_monthly_savings, so surplus and affordability are derived from those
+# sections (as FinancialCalculator.assemble_plan does) unless stored. Each
+# average has its own count, covering only the plans that could supply it.
+
+# (exclusive upper bound, label); None closes the last band
+AGE_BANDS = ((25, "<25"), (35, "25-34"), (45, "35-44"), (55, "45-54"), (None, "55+"))
+INCOME_BANDS = (
+    (25000, "<25k"), (50000, "25k-50k"), (100000, "50k-1L"), (200000, "1L-2L"), (None, "2L+"),
+)
+
+# Monthly commitments a plan's surplus is net of: (path, periods per month)
+COMMITMENT_FIELDS = (
+    ("protection.term_insurance.yearly_cost", 12),
+    ("protection.health_insurance.yearly_cost", 12),
+    ("wealth.emergency_fund.monthly_contribution", 1),
+    ("wealth.nps_plan.monthly_contribution", 1),
+)
+CHILD_DEPOSITS_FIELD = "wealth.child_plans"
+
+# Everything a plan contributes to its cohort
+ANALYTICS_FIELDS = (
+    "profile.age", "profile.monthly_income", "profile.monthly_expenses", "surplus", "total_monthly_savings",
+    "affordability.is_affordable", CHILD_DEPOSITS_FIELD, *(path for path, _ in COMMITMENT_FIELDS),
+)
+ANALYTICS_PROJECTION = {path: 1 for path in ANALYTICS_FIELDS}
+
+ROLLUP_SUMS = (
+    "plans", "surplus_plans", "surplus_sum", "savings_plans", "savings_sum", "affordability_plans", "unaffordable",
+)
+
+GROUP_FIELDS = {"age": ("age_band",), "income": ("income_band",), "cohort": ("age_band", "income_band")}
+
+Contribution = Tuple[str, Dict[str, str], Dict[str, float]]
+
+
+def _band(value: float, bands) -> str:
+    for upper, label in bands:
+        if upper is None or value < upper:
+            return label
+
+
+def _number(value) -> Optional[float]:
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _child_deposits(plan: Dict) -> float:
+    child_plans = get_path(plan, CHILD_DEPOSITS_FIELD)
+    if isinstance(child_plans, dict):
+        child_plans = [child_plans]
+    if not isinstance(child_plans, list):
+        return 0
+    deposits = (child.get("yearly_deposit") for child in child_plans if isinstance(child, dict))
+    return sum(deposit for deposit in deposits if _number(deposit) is not None)
+
+
+def plan_surplus(plan: Dict) -> Optional[float]:
+    """Stored surplus, else income less expenses and commitments; None without the inputs"""
+    stored = _number(plan.get("surplus"))
+    if stored is not None:
+        return stored
+    profile = plan.get("profile") or {}
+    income, expenses = _number(profile.get("monthly_income")), _number(profile.get("monthly_expenses"))
+    commitments = [_number(get_path(plan, path)) for path, _ in COMMITMENT_FIELDS]
+    if income is None or expenses is None or None in commitments:
+        return None
+    monthly = sum(value / periods for value, (_, periods) in zip(commitments, COMMITMENT_FIELDS))
+    return (income - expenses) - (monthly + _child_deposits(plan) / 12)
+
+
+def plan_is_affordable(plan: Dict) -> Optional[bool]:
+    """Stored affordability, else whether the savings fit within income less expenses"""
+    stored = get_path(plan, "affordability.is_affordable")
+    if isinstance(stored, bool):
+        return stored
+    profile = plan.get("profile") or {}
+    income, expenses = _number(profile.get("monthly_income")), _number(profile.get("monthly_expenses"))
+    savings = _number(plan.get("total_monthly_savings"))
+    if income is None or expenses is None or savings is None:
+        return None
+    return savings <= income - expenses
+
+
+def plan_contribution(plan: Dict) -> Optional[Contribution]:
+    """(cohort id, band labels, sums) a plan adds to its cohort, or None if it has no usable profile"""
+    profile = plan.get("profile") or {}
+    age, income = _number(profile.get("age")), _number(profile.get("monthly_income"))
+    if age is None or income is None:
+        return None
+    bands = {"age_band": _band(age, AGE_BANDS), "income_band": _band(income, INCOME_BANDS)}
+    surplus, savings = plan_surplus(plan), _number(plan.get("total_monthly_savings"))
+    affordable = plan_is_affordable(plan)
+    sums = {
+        "plans": 1,
+        "surplus_plans": 0 if surplus is None else 1,
+        "surplus_sum": surplus or 0,
+        "savings_plans": 0 if savings is None else 1,
+        "savings_sum": savings or 0,
+        "affordability_plans": 0 if affordable is None else 1,
+        "unaffordable": 1 if affordable is False else 0,
+    }
+    return f"{bands['age_band']}|{bands['income_band']}", bands, sums
+
+
+async def _apply(db, contributions: Iterable[Tuple[Contribution, int]]) -> None:
+    """Add (sign 1) or remove (sign -1) contributions, one $inc per cohort touched"""
+    totals: Dict[str, Tuple[Dict, Dict[str, float]]] = {}
+    for (cohort_id, bands, sums), sign in contributions:
+        _, cohort_sums = totals.setdefault(cohort_id, (bands, {}))
+        for name, value in sums.items():
+            cohort_sums[name] = cohort_sums.get(name, 0) + sign * value
+    now = datetime.utcnow()
+    for cohort_id, (bands, sums) in totals.items():
+        if not any(sums.values()):
+            continue
+        await db.plan_cohorts.update_one(
+            {"_id": cohort_id},
+            {"$inc": sums, "$set": {"updated_at": now}, "$setOnInsert": bands},
+            upsert=True
+        )
+
+
+async def record_plans_created(db, plans: Iterable[Dict]) -> None:
+    contributions = [plan_contribution(plan) for plan in plans]
+    await _apply(db, [(c, 1) for c in contributions if c is not None])
+
+
+async def record_plan_deleted(db, plan: Dict) -> None:
+    contribution = plan_contribution(plan)
+    if contribution is not None:
+        await _apply(db, [(contribution, -1)])
+
+
+async def record_plan_updated(db, before: Dict, mongo_update: Dict) -> None:
+    """Move a plan's contribution; before must include ANALYTICS_FIELDS"""
+    after = apply_update(copy.deepcopy(before), mongo_update)
+    old, new = plan_contribution(before), plan_contribution(after)
+    if old == new:
+        return
+    changes = []
+    if old is not None:
+        changes.append((old, -1))
+    if new is not None:
+        changes.append((new, 1))
+    await _apply(db, changes)
+
+
+def _band_expression(field: str, bands) -> Dict:
+    return {"$switch": {
+        "branches": [{"case": {"$lt": [f"${field}", upper]}, "then": label} for upper, label in bands if upper],
+        "default": bands[-1][1],
+    }}
+
+
+def _is_number(field: str) -> Dict:
+    return {"$isNumber": f"${field}"}
+
+
+def _is_bool(expression) -> Dict:
+    return {"$or": [{"$eq": [expression, True]}, {"$eq": [expression, False]}]}
+
+
+def _surplus_expression() -> Dict:
+    """plan_surplus as an aggregation expression"""
+    commitments = [{"$divide": [f"${path}", periods]} for path, periods in COMMITMENT_FIELDS]
+    child_deposits = {"$ifNull": [{"$sum": f"${CHILD_DEPOSITS_FIELD}.yearly_deposit"}, 0]}
+    derived = {"$subtract": [
+        {"$subtract": ["$profile.monthly_income", "$profile.monthly_expenses"]},
+        {"$add": [*commitments, {"$divide": [child_deposits, 12]}]},
+    ]}
+    inputs = [_is_number("profile.monthly_expenses"), *(_is_number(path) for path, _ in COMMITMENT_FIELDS)]
+    return {"$cond": [_is_number("surplus"), "$surplus", {"$cond": [{"$and": inputs}, derived, None]}]}
+
+
+def _affordable_expression() -> Dict:
+    """plan_is_affordable as an aggregation expression"""
+    stored = "$affordability.is_affordable"
+    derived = {"$lte": [
+        "$total_monthly_savings", {"$subtract": ["$profile.monthly_income", "$profile.monthly_expenses"]}
+    ]}
+    inputs = [_is_number("profile.monthly_expenses"), _is_number("total_monthly_savings")]
+    return {"$cond": [_is_bool(stored), stored, {"$cond": [{"$and": inputs}, derived, None]}]}
+
+
+def _count_if(condition: Dict) -> Dict:
+    return {"$sum": {"$cond": [condition, 1, 0]}}
+
+
+def rebuild_pipeline() -> List[Dict]:
+    """Aggregation that recomputes every cohort from financial_plans into plan_cohorts"""
+    return [
+        {"$match": {"profile.age": {"$type": "number"}, "profile.monthly_income": {"$type": "number"}}},
+        {"$project": {
+            "age_band": _band_expression("profile.age", AGE_BANDS),
+            "income_band": _band_expression("profile.monthly_income", INCOME_BANDS),
+            "surplus": _surplus_expression(),
+            "savings": {"$cond": [_is_number("total_monthly_savings"), "$total_monthly_savings", None]},
+            "affordable": _affordable_expression(),
+        }},
+        {"$group": {
+            "_id": {"$concat": ["$age_band", "|", "$income_band"]},
+            "age_band": {"$first": "$age_band"},
+            "income_band": {"$first": "$income_band"},
+            "plans": {"$sum": 1},
+            "surplus_plans": _count_if(_is_number("surplus")),
+            "surplus_sum": {"$sum": "$surplus"},
+            "savings_plans": _count_if(_is_number("savings")),
+            "savings_sum": {"$sum": "$savings"},
+            "affordability_plans": _count_if(_is_bool("$affordable")),
+            "unaffordable": _count_if({"$eq": ["$affordable", False]}),
+        }},
+        {"$set": {"updated_at": "$$NOW"}},
+        # Replaces plan_cohorts atomically once the aggregation completes
+        {"$out": "plan_cohorts"},
+    ]
+
+
+async def rebuild_cohorts(db) -> int:
+    """Recompute all rollups from scratch; returns the number of cohorts.
+
+    Not serialized with plan writes: a write that lands after the scan has
+    read its plan updates the old plan_cohorts, which $out then replaces, so
+    that change is lost until the next rebuild. Run it while writes are quiet.
+    """
+    await db.financial_plans.aggregate(rebuild_pipeline(), allowDiskUse=True).to_list(None)
+    return await db.plan_cohorts.count_documents({})
+
+
+def _average(total: float, count: int, digits: int) -> Optional[float]:
+    return round(total / count, digits) if count else None
+
+
+async def cohort_summary(db, group_by: str = "cohort") -> Dict:
+    """Averages and shares per cohort, merged into coarser groups if asked; reads only the rollups"""
+    fields = GROUP_FIELDS[group_by]
+    rollups = await db.plan_cohorts.find({"plans": {"$gt": 0}}).to_list(None)
+    groups: Dict[Tuple, Dict[str, float]] = {}
+    for rollup in rollups:
+        sums = groups.setdefault(tuple(rollup[f] for f in fields), dict.fromkeys(ROLLUP_SUMS, 0))
+        for name in sums:
+            sums[name] += rollup.get(name, 0)
+
+    order = {label: index for bands in (AGE_BANDS, INCOME_BANDS) for index, (_, label) in enumerate(bands)}
+    cohorts = []
+    for key in sorted(groups, key=lambda k: [order.get(label, len(order)) for label in k]):
+        sums = groups[key]
+        cohorts.append({
+            **dict(zip(fields, key)),
+            "plans": sums["plans"],
+            "avg_surplus": _average(sums["surplus_sum"], sums["surplus_plans"], 2),
+            "avg_monthly_savings": _average(sums["savings_sum"], sums["savings_plans"], 2),
+            "unaffordable_share": _average(sums["unaffordable"], sums["affordability_plans"], 4),
+        })
+    return {"group_by": group_by, "total_plans": sum(c["plans"] for c in cohorts), "cohorts": cohorts}
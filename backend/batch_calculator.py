@@ -0,0 +1,281 @@
+from typing import Dict, List
+
+import numpy as np
+
+from financial_calculator import FinancialCalculator
+from rate_registry import current_rates
+
+# Mirrors the fixed assumptions used by FinancialCalculator.calculate_comprehensive_plan
+TERM_MULTIPLIER = 20
+TERM_MIN_PREMIUM_RATE = 0.008
+TERM_MAX_AGE = 80
+RETIREMENT_AGE = 60
+RETIREMENT_MULTIPLIER = 30
+EMERGENCY_MONTHS = 6
+EMERGENCY_BUILD_PERIOD = 24
+SUKANYA_DEPOSIT = 150000
+PPF_DEPOSIT = 50000
+MF_SHARE = 0.6
+GOLD_SHARE = 0.075
+STOCK_SHARE = 0.15
+SIP_RETURN = 0.13
+SIP_YEARS = 20
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _typed(values: np.ndarray, as_int: np.ndarray) -> list:
+    """values as a Python list, with ints in the rows where FinancialCalculator returns an int"""
+    out = values.tolist()
+    for index in np.flatnonzero(as_int).tolist():
+        out[index] = int(out[index])
+    return out
+
+
+class BatchFinancialCalculator:
+    """Vectorized counterpart of FinancialCalculator for many profiles at once.
+
+    Values and JSON types match the scalar path: amounts derived only from an
+    int income or expense stay ints, as do its literal 0 fallbacks.
+    """
+
+    @staticmethod
+    def _columns(profiles: List[dict]) -> Dict[str, np.ndarray]:
+        """Turn a list of profile dicts into column arrays"""
+        n = len(profiles)
+        age = np.fromiter((p["age"] for p in profiles), dtype=np.int64, count=n)
+        income = np.fromiter((p["monthly_income"] for p in profiles), dtype=np.float64, count=n)
+        expenses = np.fromiter((p["monthly_expenses"] for p in profiles), dtype=np.float64, count=n)
+        family_size = np.fromiter((p["family_size"] for p in profiles), dtype=np.int64, count=n)
+        has_daughter = np.fromiter((bool(p.get("has_daughter", False)) for p in profiles), dtype=bool, count=n)
+        daughter_age = np.fromiter(
+            (p["daughter_age"] if p.get("daughter_age") is not None else -1 for p in profiles),
+            dtype=np.int64, count=n
+        )
+        daughter_known = np.fromiter((p.get("daughter_age") is not None for p in profiles), dtype=bool, count=n)
+        has_son = np.fromiter((bool(p.get("has_son", False)) for p in profiles), dtype=bool, count=n)
+        high_risk = np.fromiter((p.get("risk_comfort", "Medium") == "High" for p in profiles), dtype=bool, count=n)
+        income_is_int = np.fromiter((_is_int(p["monthly_income"]) for p in profiles), dtype=bool, count=n)
+        expenses_is_int = np.fromiter((_is_int(p["monthly_expenses"]) for p in profiles), dtype=bool, count=n)
+        return {
+            "age": age,
+            "income": income,
+            "expenses": expenses,
+            "family_size": family_size,
+            "has_sukanya": has_daughter & daughter_known & (daughter_age < 10),
+            "daughter_age": daughter_age,
+            "has_son": has_son,
+            "high_risk": high_risk,
+            "income_is_int": income_is_int,
+            "expenses_is_int": expenses_is_int,
+        }
+
+    @staticmethod
+    def calculate_comprehensive_plans(profiles: List[dict]) -> List[Dict]:
+        """Calculate comprehensive plans for a batch of profiles with array operations"""
+        if not profiles:
+            return []
+
+        cols = BatchFinancialCalculator._columns(profiles)
+        age = cols["age"]
+        income = cols["income"]
+        expenses = cols["expenses"]
+        family_size = cols["family_size"]
+        has_sukanya = cols["has_sukanya"]
+        has_son = cols["has_son"]
+
+        annual_income = income * 12
+        available = income - expenses
+
+        # 1. Protection
+        cover = annual_income * TERM_MULTIPLIER
+        term_tenure = TERM_MAX_AGE - age
+        term_yearly = np.round(cover * TERM_MIN_PREMIUM_RATE, 2)
+        cover = np.round(cover, 2)
+        small_family = family_size <= 2
+        health_cover = np.where(small_family, 1500000, 2000000)
+        health_yearly = np.where(small_family, 18000, 24000)
+
+        # 2. Emergency Fund
+        ef_required = np.round(expenses * EMERGENCY_MONTHS, 2)
+        ef_monthly = np.round(expenses * EMERGENCY_MONTHS / EMERGENCY_BUILD_PERIOD, 2)
+
+        # 3. Retirement (NPS)
+        years_to_retirement = RETIREMENT_AGE - age
+        months_left = years_to_retirement * 12
+        target_corpus = expenses * 12 * RETIREMENT_MULTIPLIER
+        with np.errstate(divide="ignore", invalid="ignore"):
+            nps_monthly = np.where(months_left > 0, target_corpus / np.maximum(months_left, 1), 0.0)
+        nps_monthly = np.round(nps_monthly, 2)
+        target_corpus = np.round(target_corpus, 2)
+
+        # 4. Child Plans (Sukanya annuity due, compounded until maturity)
+        d_age = np.where(has_sukanya, cols["daughter_age"], 0)
+        invest_years = 15 - d_age
+        maturity_years = 21 - d_age
+        r = current_rates()["SUKANYA_RATE"]
+        sukanya_value = SUKANYA_DEPOSIT * (((np.power(1 + r, invest_years) - 1) / r) * (1 + r))
+        sukanya_value = np.round(sukanya_value * np.power(1 + r, maturity_years - invest_years), 2)
+        ppf = FinancialCalculator.calculate_ppf(PPF_DEPOSIT)
+        child_yearly = has_sukanya * SUKANYA_DEPOSIT + has_son * ppf["yearly_deposit"]
+
+        # 5. Surplus for wealth building
+        commitments = (
+            term_yearly / 12 +
+            health_yearly / 12 +
+            ef_monthly +
+            nps_monthly +
+            child_yearly / 12
+        )
+        surplus = income - expenses - commitments
+
+        # 6-8. Mutual funds, gold and stocks
+        mf_amount = np.maximum(surplus * MF_SHARE, 0)
+        monthly_rate = SIP_RETURN / 12
+        months = SIP_YEARS * 12
+        sip_factor = ((1 + monthly_rate) ** months - 1) / monthly_rate * (1 + monthly_rate)
+        mf_future_value = np.round(mf_amount * sip_factor, 2)
+        gold_amount = np.maximum(surplus * GOLD_SHARE, 0)
+        stock_eligible = cols["high_risk"] & (surplus > mf_amount + gold_amount)
+        stock_amount = np.where(
+            stock_eligible,
+            np.minimum(surplus * STOCK_SHARE, surplus - mf_amount - gold_amount),
+            0.0
+        )
+        total_savings = np.round(commitments + mf_amount + gold_amount + stock_amount, 2)
+
+        # 9. Affordability
+        essential_total = ef_monthly + term_yearly / 12 + health_yearly / 12
+        important_total = nps_monthly + child_yearly / 12
+        affordable = total_savings <= available
+
+        sukanya_plan = {
+            "scheme_name": "Sukanya Samriddhi Yojana",
+            "yearly_deposit": SUKANYA_DEPOSIT,
+            "monthly_equivalent": round(SUKANYA_DEPOSIT / 12, 2),
+        }
+        ppf_plan = {
+            "scheme_name": "PPF",
+            "yearly_deposit": ppf["yearly_deposit"],
+            "monthly_equivalent": ppf["monthly_equivalent"],
+            "maturity_value": ppf["maturity_value"],
+            "years_to_maturity": 15
+        }
+        riders = ["Critical Illness", "Accidental Death"]
+        ef_tools = ["Auto-sweep account", "Liquid fund"]
+
+        # Build the response dicts from plain Python lists, which is far cheaper
+        # than indexing numpy scalars row by row. Where the scalar path keeps an
+        # int (int inputs, max(x, 0) and no-months-left fallbacks), so does this.
+        income_is_int, expenses_is_int = cols["income_is_int"], cols["expenses_is_int"]
+        columns = (
+            _typed(cover, income_is_int), term_tenure.tolist(), term_yearly.tolist(),
+            health_cover.tolist(), health_yearly.tolist(), family_size.tolist(),
+            _typed(ef_required, expenses_is_int), ef_monthly.tolist(),
+            _typed(target_corpus, expenses_is_int), _typed(nps_monthly, months_left <= 0),
+            years_to_retirement.tolist(),
+            has_sukanya.tolist(), sukanya_value.tolist(), maturity_years.tolist(), has_son.tolist(),
+            _typed(np.round(mf_amount, 2), surplus * MF_SHARE < 0), np.round(mf_amount * 0.6, 2).tolist(),
+            np.round(mf_amount * 0.4, 2).tolist(), mf_future_value.tolist(),
+            _typed(np.round(gold_amount, 2), surplus * GOLD_SHARE < 0),
+            np.round(stock_amount, 2).tolist(), (stock_amount > 0).tolist(),
+            total_savings.tolist(), np.round(surplus, 2).tolist(),
+            _typed(np.round(available, 2), income_is_int & expenses_is_int),
+            affordable.tolist(), (total_savings - available).tolist(), available.tolist(),
+            essential_total.tolist(), important_total.tolist(), (child_yearly / 12).tolist(),
+        )
+
+        plans = []
+        for (
+            cover_i, tenure_i, term_yearly_i,
+            health_cover_i, health_yearly_i, family_i,
+            ef_required_i, ef_monthly_i,
+            corpus_i, nps_i, ytr_i,
+            sukanya_i, sukanya_value_i, sukanya_years_i, son_i,
+            mf_i, mf_index_i, mf_active_i, mf_fv_i,
+            gold_i, stock_i, has_stock_i,
+            total_i, surplus_i, available_round_i,
+            affordable_i, deficit_i, available_i,
+            essential_i, important_i, child_monthly_i,
+        ) in zip(*columns):
+            child_plans = []
+            if sukanya_i:
+                child_plans.append({
+                    **sukanya_plan,
+                    "maturity_value": sukanya_value_i,
+                    "years_to_maturity": sukanya_years_i
+                })
+            if son_i:
+                child_plans.append(dict(ppf_plan))
+
+            if affordable_i:
+                affordability = {
+                    "is_affordable": True,
+                    "deficit": 0,
+                    "suggestions": [],
+                    "adjusted_plan": None
+                }
+            else:
+                affordability = {
+                    "is_affordable": False,
+                    "deficit": deficit_i,
+                    "suggestions": FinancialCalculator.budget_suggestions(
+                        available_i, essential_i, important_i, child_monthly_i
+                    ),
+                    "adjusted_plan": None
+                }
+
+            plans.append({
+                "protection": {
+                    "term_insurance": {
+                        "cover_amount": cover_i,
+                        "tenure": tenure_i,
+                        "yearly_cost": term_yearly_i,
+                        "riders": list(riders)
+                    },
+                    "health_insurance": {
+                        "cover_amount": health_cover_i,
+                        "family_size": family_i,
+                        "yearly_cost": health_yearly_i
+                    }
+                },
+                "wealth": {
+                    "emergency_fund": {
+                        "required_amount": ef_required_i,
+                        "monthly_contribution": ef_monthly_i,
+                        "build_period": EMERGENCY_BUILD_PERIOD,
+                        "tools": list(ef_tools)
+                    },
+                    "nps_plan": {
+                        "target_corpus": corpus_i,
+                        "monthly_contribution": nps_i,
+                        "expected_value": corpus_i,
+                        "years_to_retirement": ytr_i
+                    },
+                    "child_plans": child_plans,
+                    "mutual_funds": {
+                        "monthly_sip": mf_i,
+                        "index_allocation": mf_index_i,
+                        "active_allocation": mf_active_i,
+                        "expected_return": 13.0,
+                        "projected_value": mf_fv_i
+                    },
+                    "gold": {
+                        "monthly_amount": gold_i,
+                        "percentage": 7.5
+                    },
+                    "stocks": {
+                        "monthly_amount": stock_i,
+                        "percentage": 15.0,
+                        "risk_disclaimer": True
+                    } if has_stock_i else None
+                },
+                "total_monthly_savings": total_i,
+                "surplus": surplus_i,
+                "available_monthly_savings": available_round_i,
+                "affordability": affordability
+            })
+
+        return plans
@@ -0,0 +1,273 @@
+"""Compute plans offline for a CSV or Parquet file of customer profiles.
+
+Rows are read in chunks, validated against ProfileData and planned with the
+vectorized batch engine across a process pool; results are written in input
+order as NDJSON, CSV or Parquet, one chunk at a time, so memory stays bounded
+by the number of chunks in flight. No server or database is needed.
+
+    cd backend && python batch_cli.py profiles.csv plans.parquet [--chunk-size 5000] [--workers 8]
+
+Parquet input/output needs pyarrow. Invalid rows are counted and, with
+--errors, written to an NDJSON file with their row numbers.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from pydantic import ValidationError
+
+from batch_calculator import BatchFinancialCalculator
+from models import ProfileData
+from serialization import dumps, ndjson_line
+
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+# Every optional section populated, so its flattened columns name them all
+_SCHEMA_PROFILE = {
+    "age": 30, "monthly_income": 400000, "monthly_expenses": 50000, "family_size": 4, "has_dependents": True,
+    "risk_comfort": "High", "has_daughter": True, "daughter_age": 3, "has_son": True, "son_age": 5,
+}
+
+# Counts, ages and terms; every other number is money or a rate and written as float
+_INTEGER_COLUMNS = {
+    "row", "profile.age", "profile.family_size", "profile.daughter_age", "profile.son_age",
+    "protection.term_insurance.tenure", "protection.health_insurance.family_size",
+    "wealth.emergency_fund.build_period", "wealth.nps_plan.years_to_retirement",
+}
+
+# A chunk's (row number, raw row) pairs
+Chunk = List[Tuple[int, Dict]]
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        sys.exit("Parquet files need pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def detect_format(path: str, explicit: Optional[str]) -> str:
+    if explicit:
+        return explicit
+    try:
+        return FORMATS[Path(path).suffix.lower()]
+    except KeyError:
+        sys.exit(f"Can't tell the format of {path}; pass it explicitly")
+
+
+def read_chunks(path: str, fmt: str, chunk_size: int) -> Iterator[Chunk]:
+    """Numbered rows in chunks; missing cells are dropped so model defaults apply"""
+    row = 0
+    if fmt == "csv":
+        # Strings throughout: ProfileData does the type coercion and reports bad values
+        batches = (frame.to_dict("records") for frame in pd.read_csv(path, dtype=str, chunksize=chunk_size))
+    elif fmt == "parquet":
+        parquet_file = _import_pyarrow().parquet.ParquetFile(path)
+        batches = (batch.to_pylist() for batch in parquet_file.iter_batches(batch_size=chunk_size))
+    else:
+        sys.exit(f"Unsupported input format {fmt}")
+    for records in batches:
+        chunk = []
+        for record in records:
+            row += 1
+            chunk.append((row, {k: v for k, v in record.items() if v is not None and not pd.isna(v)}))
+        yield chunk
+
+
+def _flatten(value: Dict, prefix: str = "", out: Optional[Dict] = None) -> Dict:
+    """One key per nested scalar (wealth.gold.percentage); lists become JSON strings"""
+    out = {} if out is None else out
+    for key, item in value.items():
+        if isinstance(item, dict):
+            _flatten(item, f"{prefix}{key}.", out)
+        else:
+            out[f"{prefix}{key}"] = dumps(item).decode("utf-8") if isinstance(item, list) else item
+    return out
+
+
+def plan_chunk(chunk: Chunk, id_column: Optional[str], flat: bool = False) -> Tuple[List[Dict], List[Dict]]:
+    """Validate a chunk and plan its valid rows; returns (results, errors).
+
+    flat results are already flattened for CSV/Parquet, which spreads that
+    work across the workers too.
+    """
+    rows, profiles, errors = [], [], []
+    for row, raw in chunk:
+        try:
+            profiles.append(ProfileData(**raw).model_dump())
+            rows.append((row, raw.get(id_column) if id_column else None))
+        except ValidationError as e:
+            errors.append({"row": row, "error": e.errors(include_url=False, include_context=False)})
+        except TypeError as e:
+            errors.append({"row": row, "error": str(e)})
+    plans = BatchFinancialCalculator.calculate_comprehensive_plans(profiles)
+    results = []
+    for (row, record_id), profile, plan in zip(rows, profiles, plans):
+        result = {"row": row, "profile": profile, **plan}
+        if id_column:
+            result = {"id": record_id, **result}
+        results.append(_flatten(result) if flat else result)
+    return results, errors
+
+
+def _flat_dtype(column: str, dtype) -> str:
+    """Nullable column types, since e.g. a Low-risk plan has no stocks section"""
+    if column in _INTEGER_COLUMNS:
+        return "Int64"
+    if pd.api.types.is_bool_dtype(dtype):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "float64"
+    return "object"
+
+
+class _Writer:
+    def __init__(self, path: str, fmt: str, id_column: Optional[str]):
+        self.path = path
+        self.fmt = fmt
+        self._parquet = None
+        self._csv_header = True
+        # CSV and Parquet take the flattened results
+        self.flat = fmt != "ndjson"
+        self._file = open(path, "wb") if fmt in ("ndjson", "csv") else None
+        if fmt == "parquet":
+            _import_pyarrow()
+        # Fixed columns and dtypes, so every chunk matches the first one
+        schema_results, _ = plan_chunk([(0, _SCHEMA_PROFILE)], id_column, flat=True)
+        schema = pd.DataFrame(schema_results)
+        self._columns = list(schema.columns)
+        self._dtypes = {column: _flat_dtype(column, dtype) for column, dtype in schema.dtypes.items()}
+
+    def write(self, results: List[Dict]) -> None:
+        if not results:
+            return
+        if self.fmt == "ndjson":
+            self._file.write(b"".join(ndjson_line(result) for result in results))
+            return
+        frame = pd.DataFrame.from_records(results, columns=self._columns).astype(self._dtypes)
+        if self.fmt == "csv":
+            frame.to_csv(self._file, header=self._csv_header, index=False)
+            self._csv_header = False
+        else:
+            pyarrow = _import_pyarrow()
+            table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+        if self._parquet:
+            self._parquet.close()
+
+
+class _Progress:
+    """Row counts and throughput on stderr, at most once per interval"""
+
+    def __init__(self, interval: float = 2.0):
+        self.interval = interval
+        self.started = time.perf_counter()
+        self._last_report = self.started
+        self.planned = 0
+        self.invalid = 0
+
+    def add(self, planned: int, invalid: int) -> None:
+        self.planned += planned
+        self.invalid += invalid
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report("progress")
+
+    def report(self, label: str) -> None:
+        elapsed = time.perf_counter() - self.started
+        rows = self.planned + self.invalid
+        print(
+            f"{label}: {rows:,} rows ({self.planned:,} planned, {self.invalid:,} invalid) "
+            f"in {elapsed:.1f}s, {rows / elapsed if elapsed else 0:,.0f} rows/s",
+            file=sys.stderr, flush=True
+        )
+
+
+class _InlineExecutor(Executor):
+    """Runs tasks in the calling process (--workers 0), for debugging and tiny files"""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def run(input_path: str, output_path: str, input_format: Optional[str] = None, output_format: Optional[str] = None,
+        chunk_size: int = 5000, workers: Optional[int] = None, id_column: Optional[str] = None,
+        errors_path: Optional[str] = None) -> _Progress:
+    if workers is None:
+        # A single worker process only adds pickling overhead on one core
+        workers = os.cpu_count() if (os.cpu_count() or 1) > 1 else 0
+    chunks = read_chunks(input_path, detect_format(input_path, input_format), chunk_size)
+    writer = _Writer(output_path, detect_format(output_path, output_format), id_column)
+    errors_file = open(errors_path, "wb") if errors_path else None
+    progress = _Progress()
+    executor = (
+        ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        if workers > 0 else _InlineExecutor()
+    )
+    # A couple of chunks queued per worker keeps it busy without reading the whole file
+    max_in_flight = max(1, workers) * 2
+    in_flight: deque = deque()
+
+    def drain_one() -> None:
+        results, errors = in_flight.popleft().result()
+        writer.write(results)
+        if errors_file and errors:
+            errors_file.write(b"".join(ndjson_line(error) for error in errors))
+        progress.add(len(results), len(errors))
+
+    try:
+        with executor:
+            for chunk in chunks:
+                in_flight.append(executor.submit(plan_chunk, chunk, id_column, writer.flat))
+                if len(in_flight) >= max_in_flight:
+                    drain_one()
+            while in_flight:
+                drain_one()
+    finally:
+        writer.close()
+        if errors_file:
+            errors_file.close()
+    progress.report("done")
+    return progress
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="Profiles file (.csv or .parquet)")
+    parser.add_argument("output", help="Plans file (.ndjson, .csv or .parquet)")
+    parser.add_argument("--input-format", choices=("csv", "parquet"))
+    parser.add_argument("--output-format", choices=("ndjson", "csv", "parquet"))
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per chunk (default 5000)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count, inline on one core; 0 runs inline)")
+    parser.add_argument("--id-column", help="Input column copied to each result as id")
+    parser.add_argument("--errors", help="Write invalid rows' errors to this NDJSON file")
+    args = parser.parse_args()
+    run(
+        args.input, args.output, args.input_format, args.output_format,
+        chunk_size=args.chunk_size, workers=args.workers, id_column=args.id_column, errors_path=args.errors
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Run every benchmark suite and optionally compare against a previous run.
+
+    cd backend && python -m benchmarks [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.common import environment, print_results
+
+SUITES = ("calculator", "serialization", "api", "startup")
+
+
+def load_suite(name: str):
+    if name == "calculator":
+        from benchmarks import bench_calculator as module
+    elif name == "serialization":
+        from benchmarks import bench_serialization as module
+    elif name == "api":
+        from benchmarks import bench_api as module
+    else:
+        from benchmarks import bench_startup as module
+    return module.run
+
+
+def regressions(current: Dict[str, List[Dict]], baseline: Dict[str, List[Dict]], threshold: float) -> List[str]:
+    """Cases whose median got slower than the baseline by more than threshold"""
+    found = []
+    for suite, results in current.items():
+        previous = {r["name"]: r for r in baseline.get(suite, [])}
+        for result in results:
+            before = previous.get(result["name"])
+            if before and result["median_us"] > before["median_us"] * (1 + threshold):
+                found.append(
+                    f"{suite}: {result['name']} {before['median_us']:.3f} us -> {result['median_us']:.3f} us "
+                    f"(+{(result['median_us'] / before['median_us'] - 1) * 100:.0f}%)"
+                )
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write all results as JSON to this path")
+    parser.add_argument("--suite", action="append", choices=SUITES, help="Suite to run (repeatable; default all)")
+    parser.add_argument("--compare", help="Previous --output file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed median slowdown before a case counts as a regression (default 0.25)")
+    args = parser.parse_args()
+
+    suites: Dict[str, List[Dict]] = {}
+    for name in args.suite or SUITES:
+        print(f"== {name}")
+        suites[name] = load_suite(name)()
+        print_results(suites[name])
+
+    if args.output:
+        payload = {"environment": environment(), "suites": suites}
+        Path(args.output).write_text(json.dumps(payload, indent=2) + "\n")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())["suites"]
+        found = regressions(suites, baseline, args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
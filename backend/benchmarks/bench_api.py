@@ -0,0 +1,141 @@
+"""End-to-end latency of the API routes, driven in-process through ASGI.
+
+Requests go through the full FastAPI stack (routing, validation, handlers,
+serialization) via httpx's ASGI transport; server.db is swapped for the
+in-memory stand-in so no MongoDB is needed.
+
+    cd backend && python -m benchmarks.bench_api [--output results.json]
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from benchmarks.common import time_async_call, print_results, write_results
+from benchmarks.memory_db import InMemoryDatabase
+
+import httpx
+
+import server
+from financial_calculator import FinancialCalculator
+from plan_ingest import prepare_plan
+
+# httpx logs every request at INFO, which would dominate the timings
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+SAMPLE_PROFILE = {
+    "age": 35,
+    "monthly_income": 100000,
+    "monthly_expenses": 50000,
+    "family_size": 4,
+    "has_dependents": True,
+    "risk_comfort": "High",
+    "has_daughter": True,
+    "daughter_age": 5,
+    "has_son": True,
+    "son_age": 8,
+}
+
+
+@asynccontextmanager
+async def in_process_client(db: InMemoryDatabase = None) -> AsyncIterator[httpx.AsyncClient]:
+    """httpx client bound to server.app with server.db pointed at an in-memory database"""
+    previous = server.db
+    server.db = db if db is not None else InMemoryDatabase()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+    finally:
+        server.db = previous
+
+
+def plan_document(user_id: str, profile: dict) -> dict:
+    """A plan shaped like the ones the app saves: the profile plus the calculated sections it keeps"""
+    plan = FinancialCalculator.calculate_comprehensive_plan(profile)
+    return prepare_plan({
+        "user_id": user_id,
+        "profile": profile,
+        "protection": plan["protection"],
+        "wealth": plan["wealth"],
+        "goals": {"goals": []},
+        "total_monthly_savings": plan["total_monthly_savings"],
+    })
+
+
+async def seed_plans(db: InMemoryDatabase, user_id: str, count: int) -> list:
+    docs = [
+        plan_document(user_id, {**SAMPLE_PROFILE, "monthly_income": 50000 + 1000 * i})
+        for i in range(count)
+    ]
+    await db.financial_plans.insert_many(docs)
+    return [doc["_id"] for doc in docs]
+
+
+async def run_async(seeded_plans: int = 200) -> list:
+    db = InMemoryDatabase()
+    plan_ids = await seed_plans(db, "bench-user", seeded_plans)
+    plan_doc = await db.financial_plans.find_one({"_id": plan_ids[0]})
+    update_body = {k: v for k, v in plan_doc.items() if k not in ("_id", "created_at", "updated_at")}
+    incomes = itertools.count(200000)
+
+    async with in_process_client(db) as client:
+        etag = (await client.get("/api/scheme-rates")).headers["etag"]
+
+        def ok(response: httpx.Response) -> None:
+            if response.status_code >= 400:
+                raise RuntimeError(f"{response.request.url} -> {response.status_code}: {response.text}")
+
+        cases = [
+            ("GET /api/", lambda: client.get("/api/")),
+            ("POST /api/calculate-plan (cached)",
+             lambda: client.post("/api/calculate-plan", json=SAMPLE_PROFILE)),
+            ("POST /api/calculate-plan (uncached)",
+             lambda: client.post("/api/calculate-plan", json={**SAMPLE_PROFILE, "monthly_income": next(incomes)})),
+            ("POST /api/calculate-plan?simulate=true&paths=1000",
+             lambda: client.post("/api/calculate-plan?simulate=true&paths=1000&seed=1", json=SAMPLE_PROFILE)),
+            ("POST /api/calculate-plans/batch (100)",
+             lambda: client.post("/api/calculate-plans/batch", json=[SAMPLE_PROFILE] * 100)),
+            ("GET /api/calculate-plan/timeline (20y)",
+             lambda: client.get("/api/calculate-plan/timeline", params={**SAMPLE_PROFILE, "years": 20})),
+            ("POST /api/calculate-goal",
+             lambda: client.post("/api/calculate-goal", json={"amount_today": 1000000, "years": 10})),
+            ("GET /api/scheme-rates", lambda: client.get("/api/scheme-rates")),
+            ("GET /api/scheme-rates (304)",
+             lambda: client.get("/api/scheme-rates", headers={"If-None-Match": etag})),
+            ("POST /api/plans",
+             lambda: client.post("/api/plans", json={"user_id": "bench-writer", "profile": SAMPLE_PROFILE})),
+            (f"GET /api/plans/{{user_id}} (limit 50 of {seeded_plans})",
+             lambda: client.get("/api/plans/bench-user", params={"limit": 50})),
+            (f"GET /api/plans/{{user_id}}?view=summary (limit 50 of {seeded_plans})",
+             lambda: client.get("/api/plans/bench-user", params={"limit": 50, "view": "summary"})),
+            ("GET /api/plan/{plan_id}", lambda: client.get(f"/api/plan/{plan_ids[0]}")),
+            ("PUT /api/plan/{plan_id}", lambda: client.put(f"/api/plan/{plan_ids[1]}", json=update_body)),
+        ]
+
+        results = []
+        for name, request in cases:
+            ok(await request())
+            results.append({"name": name, **await time_async_call(request)})
+        return results
+
+
+def run(seeded_plans: int = 200) -> list:
+    return asyncio.run(run_async(seeded_plans))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--seeded-plans", type=int, default=200)
+    args = parser.parse_args()
+    results = run(args.seeded_plans)
+    print_results(results)
+    if args.output:
+        write_results(args.output, "api", results)
+
+
+if __name__ == "__main__":
+    main()
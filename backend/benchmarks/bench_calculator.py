@@ -0,0 +1,80 @@
+"""Micro-benchmarks for the FinancialCalculator static methods and the batch engine.
+
+    cd backend && python -m benchmarks.bench_calculator [--output results.json]
+"""
+import argparse
+
+from benchmarks.common import time_call, print_results, write_results
+
+from batch_calculator import BatchFinancialCalculator
+from financial_calculator import FinancialCalculator
+from plan_types import PlanResult
+
+SAMPLE_PROFILE = {
+    "age": 35,
+    "monthly_income": 100000,
+    "monthly_expenses": 50000,
+    "family_size": 4,
+    "has_dependents": True,
+    "risk_comfort": "High",
+    "has_daughter": True,
+    "daughter_age": 5,
+    "has_son": True,
+    "son_age": 8,
+}
+
+# Expenses close to income so the affordability/adjustment paths do real work
+TIGHT_PROFILE = {**SAMPLE_PROFILE, "monthly_income": 40000, "monthly_expenses": 34000}
+
+
+def run(batch_size: int = 1000) -> list:
+    fc = FinancialCalculator
+    plan = fc.calculate_comprehensive_plan(SAMPLE_PROFILE)
+    tight_plan = fc.calculate_comprehensive_plan(TIGHT_PROFILE)
+    tight_result: PlanResult = fc.compute_plan(TIGHT_PROFILE)
+    batch = [
+        {**SAMPLE_PROFILE, "age": 22 + i % 35, "monthly_income": 30000 + 1000 * (i % 200)}
+        for i in range(batch_size)
+    ]
+
+    cases = [
+        ("calculate_term_insurance_coverage", lambda: fc.calculate_term_insurance_coverage(1200000, 35)),
+        ("calculate_health_insurance", lambda: fc.calculate_health_insurance(4)),
+        ("calculate_emergency_fund", lambda: fc.calculate_emergency_fund(50000)),
+        ("calculate_retirement_corpus", lambda: fc.calculate_retirement_corpus(50000, 35)),
+        ("calculate_sukanya_samriddhi", lambda: fc.calculate_sukanya_samriddhi(5)),
+        ("calculate_ppf", lambda: fc.calculate_ppf()),
+        ("calculate_sip_returns", lambda: fc.calculate_sip_returns(10000, 20, 0.13)),
+        ("simulate_sip_returns/10k-paths", lambda: fc.simulate_sip_returns(10000, 20, 0.13, seed=42)),
+        ("calculate_goal_requirement", lambda: fc.calculate_goal_requirement(1000000, 10)),
+        ("budget_suggestions", lambda: fc.budget_suggestions(10000, 15000, 5000, 4000)),
+        ("adjust_plan_to_budget/affordable", lambda: fc.adjust_plan_to_budget(plan, plan["available_monthly_savings"])),
+        ("adjust_plan_to_budget/deficit", lambda: fc.adjust_plan_to_budget(tight_plan, tight_plan["available_monthly_savings"])),
+        ("assess_affordability", lambda: fc.assess_affordability(tight_result)),
+        ("build_term_insurance", lambda: fc.build_term_insurance(SAMPLE_PROFILE)),
+        ("build_health_insurance", lambda: fc.build_health_insurance(SAMPLE_PROFILE)),
+        ("build_emergency_fund", lambda: fc.build_emergency_fund(SAMPLE_PROFILE)),
+        ("build_nps_plan", lambda: fc.build_nps_plan(SAMPLE_PROFILE)),
+        ("build_child_plans", lambda: fc.build_child_plans(SAMPLE_PROFILE)),
+        ("compute_plan", lambda: fc.compute_plan(SAMPLE_PROFILE)),
+        ("calculate_comprehensive_plan", lambda: fc.calculate_comprehensive_plan(SAMPLE_PROFILE)),
+        ("calculate_comprehensive_plan/deficit", lambda: fc.calculate_comprehensive_plan(TIGHT_PROFILE)),
+        (f"batch/calculate_comprehensive_plans/{batch_size}",
+         lambda: BatchFinancialCalculator.calculate_comprehensive_plans(batch)),
+    ]
+    return [{"name": name, **time_call(fn)} for name, fn in cases]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    results = run(args.batch_size)
+    print_results(results)
+    if args.output:
+        write_results(args.output, "calculator", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Serialization cost per plan: FastAPI's default path vs the orjson pipeline.
+
+    cd backend && python -m benchmarks.bench_serialization [--output results.json]
+"""
+import argparse
+import json
+import uuid
+from datetime import datetime
+
+from benchmarks.common import time_call, print_results, write_results
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from financial_calculator import FinancialCalculator
+from serialization import FastJSONResponse, dumps
+
+SAMPLE_PROFILE = {
+    "age": 35,
+    "monthly_income": 100000,
+    "monthly_expenses": 50000,
+    "family_size": 4,
+    "has_dependents": True,
+    "risk_comfort": "High",
+    "has_daughter": True,
+    "daughter_age": 5,
+    "has_son": True,
+    "son_age": 8,
+}
+
+
+def stored_plan_document() -> dict:
+    """A plan as it comes back from motor: calculated plan plus ids and datetimes"""
+    plan = FinancialCalculator.calculate_comprehensive_plan(SAMPLE_PROFILE)
+    now = datetime.utcnow()
+    return {
+        "_id": str(uuid.uuid4()),
+        "user_id": "bench-user",
+        "profile": dict(SAMPLE_PROFILE),
+        **plan,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def default_render(content) -> bytes:
+    """What FastAPI does for a returned dict: jsonable_encoder, then JSONResponse.render"""
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def fast_render(content) -> bytes:
+    return FastJSONResponse(content).body
+
+
+def run() -> list:
+    plan = FinancialCalculator.calculate_comprehensive_plan(SAMPLE_PROFILE)
+    document = stored_plan_document()
+    page = [stored_plan_document() for _ in range(50)]
+
+    # Both paths must produce the same JSON
+    assert json.loads(default_render(document)) == json.loads(fast_render(document))
+
+    cases = [
+        ("calculate-plan/default", lambda: default_render(plan)),
+        ("calculate-plan/orjson", lambda: fast_render(plan)),
+        ("stored-plan/default", lambda: default_render(document)),
+        ("stored-plan/orjson", lambda: fast_render(document)),
+        ("plans-page-50/default", lambda: default_render(page)),
+        ("plans-page-50/orjson", lambda: fast_render(page)),
+        ("stored-plan/orjson-dumps-only", lambda: dumps(document)),
+    ]
+    return [{"name": name, **time_call(fn)} for name, fn in cases]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+    results = run()
+    print_results(results)
+    if args.output:
+        write_results(args.output, "serialization", results)
+
+
+if __name__ == "__main__":
+    main()
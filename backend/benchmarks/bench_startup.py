@@ -0,0 +1,92 @@
+"""Cold-start cost of an API worker: importing server and serving its first requests.
+
+Each run is a fresh interpreter, so module imports, route setup and first-call
+warmups are all paid again, as they are for a newly scaled-out worker. The
+child binds the in-memory database, runs the app's lifespan and times its first
+/healthz and POST /api/calculate-plan through the ASGI stack; the parent adds
+the wall time from spawning the process to the first response.
+
+    cd backend && python -m benchmarks.bench_startup [--runs 5] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.common import BACKEND_DIR, _summary, print_results, write_results
+
+
+async def _first_requests() -> Dict[str, float]:
+    import httpx
+    from benchmarks.bench_api import SAMPLE_PROFILE
+    from benchmarks.memory_db import InMemoryDatabase
+    import server
+
+    timings = {}
+    start = time.perf_counter()
+    server.db = InMemoryDatabase()
+    async with server.lifespan(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            (await client.get("/healthz")).raise_for_status()
+            timings["first /healthz"] = time.perf_counter() - start
+            (await client.post("/api/calculate-plan", json=SAMPLE_PROFILE)).raise_for_status()
+            timings["first POST /api/calculate-plan"] = time.perf_counter() - start
+    return timings
+
+
+def child() -> None:
+    start = time.perf_counter()
+    import server  # noqa: F401
+    timings = {"import server": time.perf_counter() - start}
+    timings.update(asyncio.run(_first_requests()))
+    print(json.dumps(timings), flush=True)
+
+
+def _one_run() -> Dict[str, float]:
+    # Mongo settings are removed to check that a worker starts without them
+    env = {k: v for k, v in os.environ.items() if k not in ("MONGO_URL", "DB_NAME")}
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, text=True
+    )
+    line = process.stdout.readline()
+    spawn_to_first_request = time.perf_counter() - start
+    process.wait()
+    if process.returncode != 0 or not line:
+        raise RuntimeError(f"Startup child exited with {process.returncode}")
+    timings = json.loads(line)
+    timings["process spawn to first response"] = spawn_to_first_request
+    return timings
+
+
+def run(runs: int = 5) -> List[Dict]:
+    samples = [_one_run() for _ in range(runs)]
+    return [
+        {"name": f"startup: {name}", **_summary(1, [sample[name] * 1e6 for sample in samples])}
+        for name in samples[0]
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to start (default 5)")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+    results = run(args.runs)
+    print_results(results)
+    if args.output:
+        write_results(args.output, "startup", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    # server.py and friends use flat imports relative to the backend directory
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def _summary(number: int, runs: List[float]) -> Dict:
+    return {
+        "calls_per_run": number,
+        "runs": len(runs),
+        "min_us": round(min(runs), 3),
+        "median_us": round(statistics.median(runs), 3),
+        "max_us": round(max(runs), 3),
+    }
+
+
+def time_call(fn: Callable[[], object], repeat: int = 5, min_time: float = 0.2) -> Dict:
+    """Time fn with timeit's autorange and report per-call microseconds"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2))
+    runs = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return _summary(number, runs)
+
+
+async def time_async_call(fn: Callable[[], Awaitable[object]], repeat: int = 5, min_time: float = 0.2) -> Dict:
+    """Async counterpart of time_call for coroutines run on the current event loop"""
+    async def run(number: int) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            await fn()
+        return time.perf_counter() - start
+
+    number = 1
+    while await run(number) < min_time and number < 1_000_000:
+        number *= 2
+    runs = [await run(number) / number * 1e6 for _ in range(repeat)]
+    return _summary(number, runs)
+
+
+def environment() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+def write_results(path: str, suite: str, results: List[Dict]) -> None:
+    payload = {"suite": suite, "environment": environment(), "results": results}
+    Path(path).write_text(json.dumps(payload, indent=2) + "\n")
+
+
+def print_results(results: List[Dict]) -> None:
+    width = max(len(r["name"]) for r in results)
+    for r in results:
+        print(f"{r['name']:<{width}}  median {r['median_us']:>12.3f} us   min {r['min_us']:>12.3f} us")
@@ -0,0 +1,243 @@
+"""Concurrent load against the API with per-route latency percentiles.
+
+N asyncio clients issue a weighted mix of calculate-plan, calculate-goal,
+create-plan and list-plans requests against server.app in-process (in-memory
+Mongo stand-in), with profiles drawn from a seeded generator so runs are
+repeatable. Each request first waits its turn on the event loop, and each
+database operation waits --db-latency-ms for the round-trip to Mongo, so a
+request's latency includes the time spent behind the other clients' work.
+
+    cd backend && python -m benchmarks.loadgen --clients 32 --duration 30 [--db-latency-ms 1] [--output report.json]
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import math
+import random
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.bench_api import in_process_client, seed_plans
+from benchmarks.common import environment
+from benchmarks.memory_db import InMemoryDatabase
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open-ended
+HISTOGRAM_BOUNDS_MS = (0.5, 1, 2, 3, 5, 7.5, 10, 15, 25, 50, 75, 100, 250, 500, 1000, 2500)
+
+DEFAULT_MIX = {
+    "POST /api/calculate-plan": 0.4,
+    "POST /api/calculate-goal": 0.2,
+    "POST /api/plans": 0.15,
+    "GET /api/plans/{user_id}": 0.25,
+}
+
+
+class ProfileGenerator:
+    """Seeded profiles around the scenarios backend_test.py checks"""
+
+    ARCHETYPES = ("young_professional", "parent_with_daughter", "near_retirement")
+
+    def __init__(self, seed: int = 0):
+        self.random = random.Random(seed)
+
+    def _income(self, low: int, high: int) -> int:
+        return self.random.randrange(low, high, 1000)
+
+    def profile(self, archetype: Optional[str] = None) -> Dict:
+        rnd = self.random
+        archetype = archetype or rnd.choice(self.ARCHETYPES)
+        if archetype == "young_professional":
+            income = self._income(30000, 120000)
+            return {
+                "age": rnd.randint(22, 30),
+                "monthly_income": income,
+                "monthly_expenses": round(income * rnd.uniform(0.45, 0.75)),
+                "family_size": rnd.choice((1, 1, 2)),
+                "has_dependents": False,
+                "risk_comfort": rnd.choice(("Medium", "High")),
+                "has_daughter": False,
+                "has_son": False,
+            }
+        if archetype == "parent_with_daughter":
+            income = self._income(60000, 250000)
+            has_son = rnd.random() < 0.5
+            return {
+                "age": rnd.randint(30, 45),
+                "monthly_income": income,
+                "monthly_expenses": round(income * rnd.uniform(0.4, 0.7)),
+                "family_size": 3 + int(has_son) + rnd.choice((0, 0, 1)),
+                "has_dependents": True,
+                "risk_comfort": rnd.choice(("Low", "Medium", "High")),
+                "has_daughter": True,
+                "daughter_age": rnd.randint(0, 12),
+                "has_son": has_son,
+                "son_age": rnd.randint(0, 15) if has_son else None,
+            }
+        if archetype == "near_retirement":
+            income = self._income(80000, 300000)
+            return {
+                "age": rnd.randint(50, 58),
+                "monthly_income": income,
+                "monthly_expenses": round(income * rnd.uniform(0.35, 0.6)),
+                "family_size": rnd.choice((2, 2, 3)),
+                "has_dependents": rnd.random() < 0.3,
+                "risk_comfort": rnd.choice(("Low", "Low", "Medium")),
+                "has_daughter": False,
+                "has_son": False,
+            }
+        raise ValueError(f"Unknown archetype {archetype}")
+
+    def goal(self) -> Dict:
+        return {"amount_today": self.random.randrange(100000, 5000000, 50000), "years": self.random.randint(1, 25)}
+
+
+class RouteStats:
+    def __init__(self):
+        self.latencies_ms: List[float] = []
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.errors = 0
+
+    def record(self, latency_ms: float, ok: bool) -> None:
+        self.latencies_ms.append(latency_ms)
+        self.buckets[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, latency_ms)] += 1
+        if not ok:
+            self.errors += 1
+
+    def percentile(self, p: float) -> float:
+        """Nearest-rank percentile over the recorded latencies"""
+        ordered = sorted(self.latencies_ms)
+        if not ordered:
+            return 0.0
+        return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+    def report(self, elapsed: float) -> Dict:
+        count = len(self.latencies_ms)
+        histogram = []
+        for index, bucket_count in enumerate(self.buckets):
+            upper = HISTOGRAM_BOUNDS_MS[index] if index < len(HISTOGRAM_BOUNDS_MS) else None
+            histogram.append({"le_ms": upper, "count": bucket_count})
+        return {
+            "count": count,
+            "errors": self.errors,
+            "rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(self.latencies_ms) / count, 3) if count else 0.0,
+            "p50_ms": round(self.percentile(50), 3),
+            "p90_ms": round(self.percentile(90), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(max(self.latencies_ms), 3) if count else 0.0,
+            "histogram": histogram,
+        }
+
+
+def _request_factory(client, generator: ProfileGenerator, users: List[str]) -> Dict[str, Callable]:
+    rnd = generator.random
+    return {
+        "POST /api/calculate-plan": lambda: client.post("/api/calculate-plan", json=generator.profile()),
+        "POST /api/calculate-goal": lambda: client.post("/api/calculate-goal", json=generator.goal()),
+        "POST /api/plans": lambda: client.post(
+            "/api/plans", json={"user_id": rnd.choice(users), "profile": generator.profile()}
+        ),
+        "GET /api/plans/{user_id}": lambda: client.get(f"/api/plans/{rnd.choice(users)}", params={"limit": 20}),
+    }
+
+
+async def run_load(
+    clients: int = 16,
+    duration: float = 10.0,
+    max_requests: Optional[int] = None,
+    seed: int = 0,
+    users: int = 50,
+    plans_per_user: int = 20,
+    mix: Optional[Dict[str, float]] = None,
+    db_latency_ms: float = 1.0,
+) -> Dict:
+    mix = mix or DEFAULT_MIX
+    routes: Tuple[str, ...] = tuple(mix)
+    weights = [mix[r] for r in routes]
+    stats = {route: RouteStats() for route in routes}
+    user_ids = [f"load-user-{i}" for i in range(users)]
+
+    db = InMemoryDatabase(latency=db_latency_ms / 1000)
+    for user_id in user_ids:
+        await seed_plans(db, user_id, plans_per_user)
+
+    issued = 0
+    async with in_process_client(db) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(index: int) -> None:
+            nonlocal issued
+            generator = ProfileGenerator(seed * 100003 + index)
+            requests = _request_factory(client, generator, user_ids)
+            while time.perf_counter() < deadline and (max_requests is None or issued < max_requests):
+                issued += 1
+                route = generator.random.choices(routes, weights)[0]
+                start = time.perf_counter()
+                try:
+                    # Wait behind whatever the loop is already running, as a request
+                    # arriving on a socket would; in-process calls otherwise jump the queue
+                    await asyncio.sleep(0)
+                    response = await requests[route]()
+                    ok = response.status_code < 400
+                except Exception:
+                    ok = False
+                stats[route].record((time.perf_counter() - start) * 1000, ok)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(s.latencies_ms) for s in stats.values())
+    return {
+        "config": {
+            "clients": clients, "duration": duration, "max_requests": max_requests,
+            "seed": seed, "users": users, "plans_per_user": plans_per_user, "mix": mix,
+            "db_latency_ms": db_latency_ms,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "total_requests": total,
+        "total_errors": sum(s.errors for s in stats.values()),
+        "rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "routes": {route: s.report(elapsed) for route, s in stats.items()},
+    }
+
+
+def print_report(report: Dict) -> None:
+    print(f"{report['total_requests']} requests in {report['elapsed_s']}s "
+          f"({report['rps']} req/s, {report['total_errors']} errors) "
+          f"with {report['config']['clients']} clients")
+    width = max(len(route) for route in report["routes"])
+    print(f"{'route':<{width}}  {'count':>7} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for route, r in report["routes"].items():
+        print(f"{route:<{width}}  {r['count']:>7} {r['errors']:>5} {r['rps']:>9.1f} "
+              f"{r['p50_ms']:>9.3f} {r['p90_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['max_ms']:>9.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent clients (default 16)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run (default 10)")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--users", type=int, default=50, help="Distinct user ids for plan reads/writes")
+    parser.add_argument("--plans-per-user", type=int, default=20, help="Plans seeded per user before the run")
+    parser.add_argument(
+        "--db-latency-ms", type=float, default=1.0,
+        help="Simulated round-trip per database operation (default 1)"
+    )
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load(
+        clients=args.clients, duration=args.duration, max_requests=args.requests,
+        seed=args.seed, users=args.users, plans_per_user=args.plans_per_user, db_latency_ms=args.db_latency_ms
+    ))
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps({"environment": environment(), **report}, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
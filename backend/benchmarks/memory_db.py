@@ -0,0 +1,446 @@
+"""In-memory stand-in for the parts of motor's API that server.py uses.
+
+Good enough to drive the app offline in benchmarks and load tests; it is not a
+general Mongo emulator. Documents are deep-copied on the way in and out, which
+roughly models the BSON encode/decode cost of a real round-trip. A non-zero
+latency makes every operation wait that long, as for the network round-trip to
+a real server, so concurrent requests interleave instead of running back to back.
+"""
+import asyncio
+import copy
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+_MISSING = object()
+
+
+def _get(doc: Any, path: str) -> Any:
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part, _MISSING)
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return _MISSING
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+
+def _compare(value: Any, op: str, operand: Any) -> bool:
+    if op == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if op == "$ne":
+        return (None if value is _MISSING else value) != operand
+    if op == "$in":
+        return (None if value is _MISSING else value) in operand
+    if op == "$nin":
+        return (None if value is _MISSING else value) not in operand
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if op == "$lt":
+            return value < operand
+        if op == "$lte":
+            return value <= operand
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+    except TypeError:
+        return False
+    if op == "$eq":
+        return value == operand
+    raise NotImplementedError(f"Unsupported query operator {op}")
+
+
+_TYPE_NAMES = ((bool, "bool"), (int, "int"), (float, "double"), (str, "string"), (dict, "object"), (list, "array"))
+
+
+def _type_name(value: Any) -> str:
+    if value is _MISSING:
+        return "missing"
+    if value is None:
+        return "null"
+    for kind, name in _TYPE_NAMES:
+        if isinstance(value, kind):
+            return name
+    return type(value).__name__
+
+
+def _truthy(value: Any) -> bool:
+    return value not in (_MISSING, None, False, 0)
+
+
+def _equal(first: Any, second: Any) -> bool:
+    # Python's True == 1; BSON compares bool and numbers as different types
+    if isinstance(first, bool) != isinstance(second, bool):
+        return False
+    return first == second
+
+
+def evaluate(expr: Any, variables: Dict[str, Any]) -> Any:
+    """The aggregation expression operators that plan_patch's JSON Patch tests use"""
+    if isinstance(expr, str) and expr.startswith("$$"):
+        name, _, path = expr[2:].partition(".")
+        base = _MISSING if name == "REMOVE" else variables[name]
+        return _get(base, path) if path and base is not _MISSING else base
+    if isinstance(expr, str) and expr.startswith("$"):
+        return _get(variables["ROOT"], expr[1:])
+    if isinstance(expr, list):
+        return [evaluate(item, variables) for item in expr]
+    if not isinstance(expr, dict) or len(expr) != 1 or not next(iter(expr)).startswith("$"):
+        return {k: evaluate(v, variables) for k, v in expr.items()} if isinstance(expr, dict) else expr
+    op, arg = next(iter(expr.items()))
+    if op == "$literal":
+        return arg
+    if op == "$and":
+        return all(_truthy(evaluate(item, variables)) for item in arg)
+    if op == "$cond":
+        condition, then, otherwise = arg if isinstance(arg, list) else (arg["if"], arg["then"], arg["else"])
+        return evaluate(then if _truthy(evaluate(condition, variables)) else otherwise, variables)
+    if op == "$let":
+        bound = {name: evaluate(value, variables) for name, value in arg["vars"].items()}
+        return evaluate(arg["in"], {**variables, **bound})
+    if op == "$eq":
+        first, second = (evaluate(item, variables) for item in arg)
+        return _equal(first, second)
+    value = evaluate(arg[0] if isinstance(arg, list) and op != "$arrayElemAt" else arg, variables)
+    if op == "$type":
+        return _type_name(value)
+    if op == "$isArray":
+        return isinstance(value, list)
+    if op == "$isNumber":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if op == "$size":
+        if not isinstance(value, list):
+            raise OperationFailure("The argument to $size must be an array")
+        return len(value)
+    if op == "$objectToArray":
+        if not isinstance(value, dict):
+            raise OperationFailure("$objectToArray requires a document input")
+        return [{"k": k, "v": v} for k, v in value.items()]
+    if op == "$arrayElemAt":
+        array, index = value
+        return array[index] if isinstance(array, list) and -len(array) <= index < len(array) else _MISSING
+    raise NotImplementedError(f"Unsupported expression operator {op}")
+
+
+def matches(doc: Dict, query: Dict) -> bool:
+    for key, condition in query.items():
+        if key == "$expr":
+            if not _truthy(evaluate(condition, {"ROOT": doc})):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        else:
+            value = _get(doc, key)
+            if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+                if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                    return False
+            elif condition is None:
+                if value not in (None, _MISSING):
+                    return False
+            elif value != condition:
+                return False
+    return True
+
+
+def _set_path(doc: Dict, path: str, value: Any) -> None:
+    parts = path.split(".")
+    target = doc
+    for part in parts[:-1]:
+        if isinstance(target, list):
+            target = target[int(part)]
+        else:
+            target = target.setdefault(part, {})
+    if isinstance(target, list):
+        target[int(parts[-1])] = value
+    else:
+        target[parts[-1]] = value
+
+
+def _unset_path(doc: Dict, path: str) -> None:
+    parts = path.split(".")
+    target = doc
+    for part in parts[:-1]:
+        target = target[int(part)] if isinstance(target, list) else target.get(part)
+        if target is None:
+            return
+    if isinstance(target, dict):
+        target.pop(parts[-1], None)
+
+
+def apply_update(doc: Dict, update: Dict, inserting: bool = False) -> None:
+    for op, fields in update.items():
+        if op == "$set":
+            for path, value in fields.items():
+                _set_path(doc, path, copy.deepcopy(value))
+        elif op == "$setOnInsert":
+            if inserting:
+                for path, value in fields.items():
+                    _set_path(doc, path, copy.deepcopy(value))
+        elif op == "$unset":
+            for path in fields:
+                _unset_path(doc, path)
+        elif op == "$inc":
+            for path, amount in fields.items():
+                current = _get(doc, path)
+                _set_path(doc, path, (0 if current in (_MISSING, None) else current) + amount)
+        elif op == "$push":
+            for path, value in fields.items():
+                current = _get(doc, path)
+                current = [] if current is _MISSING else list(current)
+                if isinstance(value, dict) and "$each" in value:
+                    position = value.get("$position", len(current))
+                    current[position:position] = copy.deepcopy(value["$each"])
+                else:
+                    current.append(copy.deepcopy(value))
+                _set_path(doc, path, current)
+        else:
+            raise NotImplementedError(f"Unsupported update operator {op}")
+
+
+def project(doc: Dict, projection: Optional[Dict]) -> Dict:
+    if not projection:
+        return copy.deepcopy(doc)
+    include = {k for k, v in projection.items() if v}
+    exclude = {k for k, v in projection.items() if not v}
+    if include:
+        result = {}
+        if "_id" not in exclude:
+            result["_id"] = doc.get("_id")
+        for path in include:
+            value = _get(doc, path)
+            if value is not _MISSING:
+                _set_path(result, path, copy.deepcopy(value))
+        return result
+    result = copy.deepcopy(doc)
+    for path in exclude:
+        _unset_path(result, path)
+    return result
+
+
+def sort_documents(docs: List[Dict], sort: List) -> None:
+    """Multi-key sort in place; missing/None values order first, as in Mongo"""
+    for field, direction in reversed(sort):
+        def key(doc, field=field):
+            value = _get(doc, field)
+            return (0, 0) if value in (_MISSING, None) else (1, value)
+        docs.sort(key=key, reverse=direction < 0)
+
+
+class InMemoryCursor:
+    def __init__(self, collection: "InMemoryCollection", query: Dict, projection: Optional[Dict]):
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._sort: List = []
+        self._limit = 0
+        self._skip = 0
+        self._iter = None
+        self._fetched = False
+
+    def sort(self, key_or_list, direction: int = 1) -> "InMemoryCursor":
+        self._sort = [(key_or_list, direction)] if isinstance(key_or_list, str) else list(key_or_list)
+        return self
+
+    def limit(self, limit: int) -> "InMemoryCursor":
+        self._limit = limit
+        return self
+
+    def skip(self, skip: int) -> "InMemoryCursor":
+        self._skip = skip
+        return self
+
+    def batch_size(self, size: int) -> "InMemoryCursor":
+        return self
+
+    def _results(self) -> List[Dict]:
+        docs = [doc for doc in self._collection._docs.values() if matches(doc, self._query)]
+        if self._sort:
+            sort_documents(docs, self._sort)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [project(doc, self._projection) for doc in docs]
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict]:
+        await self._collection._round_trip()
+        results = self._results()
+        return results if length is None else results[:length]
+
+    def __aiter__(self):
+        self._iter = iter(self._results())
+        self._fetched = False
+        return self
+
+    async def __anext__(self) -> Dict:
+        if not self._fetched:
+            # One round-trip for the whole result set, like a single large batch
+            self._fetched = True
+            await self._collection._round_trip()
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def close(self) -> None:
+        self._iter = None
+
+    async def explain(self) -> Dict:
+        return {"queryPlanner": {"namespace": self._collection.name, "winningPlan": {"stage": "MEMORY"}}}
+
+
+class InMemoryCollection:
+    def __init__(self, name: str, latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self._docs: Dict[Any, Dict] = {}
+        self.indexes: List = []
+
+    async def _round_trip(self) -> None:
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+    def find(self, query: Optional[Dict] = None, projection: Optional[Dict] = None) -> InMemoryCursor:
+        return InMemoryCursor(self, query or {}, projection)
+
+    async def find_one(self, query: Optional[Dict] = None, projection: Optional[Dict] = None) -> Optional[Dict]:
+        await self._round_trip()
+        query = query or {}
+        if set(query) == {"_id"} and not isinstance(query["_id"], dict):
+            doc = self._docs.get(query["_id"])
+            return project(doc, projection) if doc is not None else None
+        for doc in self._docs.values():
+            if matches(doc, query):
+                return project(doc, projection)
+        return None
+
+    def _match_one(self, query: Dict) -> Optional[Dict]:
+        if "_id" in query and not isinstance(query["_id"], dict):
+            doc = self._docs.get(query["_id"])
+            return doc if doc is not None and matches(doc, query) else None
+        for doc in self._docs.values():
+            if matches(doc, query):
+                return doc
+        return None
+
+    async def insert_one(self, doc: Dict) -> SimpleNamespace:
+        await self._round_trip()
+        if doc["_id"] in self._docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} dup key: {doc['_id']}")
+        self._docs[doc["_id"]] = copy.deepcopy(doc)
+        return SimpleNamespace(inserted_id=doc["_id"], acknowledged=True)
+
+    async def insert_many(self, docs: Iterable[Dict], ordered: bool = True) -> SimpleNamespace:
+        await self._round_trip()
+        inserted, errors = [], []
+        for index, doc in enumerate(docs):
+            if doc["_id"] in self._docs:
+                errors.append({"index": index, "code": 11000, "errmsg": "E11000 duplicate key error"})
+                if ordered:
+                    break
+                continue
+            self._docs[doc["_id"]] = copy.deepcopy(doc)
+            inserted.append(doc["_id"])
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted)})
+        return SimpleNamespace(inserted_ids=inserted, acknowledged=True)
+
+    async def update_one(self, query: Dict, update: Dict, upsert: bool = False) -> SimpleNamespace:
+        await self._round_trip()
+        doc = self._match_one(query)
+        if doc is None:
+            if not upsert:
+                return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+            doc = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+            apply_update(doc, update, inserting=True)
+            self._docs[doc["_id"]] = doc
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc["_id"])
+        before = copy.deepcopy(doc)
+        apply_update(doc, update)
+        return SimpleNamespace(matched_count=1, modified_count=int(before != doc), upserted_id=None)
+
+    async def find_one_and_update(self, query: Dict, update: Dict, projection: Optional[Dict] = None,
+                                  upsert: bool = False, return_document: bool = ReturnDocument.BEFORE) -> Optional[Dict]:
+        await self._round_trip()
+        doc = self._match_one(query)
+        if doc is None:
+            if not upsert:
+                return None
+            doc = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+            apply_update(doc, update, inserting=True)
+            self._docs[doc["_id"]] = doc
+            return project(doc, projection) if return_document == ReturnDocument.AFTER else None
+        before = project(doc, projection)
+        apply_update(doc, update)
+        return project(doc, projection) if return_document == ReturnDocument.AFTER else before
+
+    async def delete_one(self, query: Dict) -> SimpleNamespace:
+        await self._round_trip()
+        doc = self._match_one(query)
+        if doc is None:
+            return SimpleNamespace(deleted_count=0)
+        del self._docs[doc["_id"]]
+        return SimpleNamespace(deleted_count=1)
+
+    async def find_one_and_delete(self, query: Dict, projection: Optional[Dict] = None) -> Optional[Dict]:
+        await self._round_trip()
+        doc = self._match_one(query)
+        if doc is None:
+            return None
+        del self._docs[doc["_id"]]
+        return project(doc, projection)
+
+    async def delete_many(self, query: Dict) -> SimpleNamespace:
+        await self._round_trip()
+        ids = [doc_id for doc_id, doc in self._docs.items() if matches(doc, query)]
+        for doc_id in ids:
+            del self._docs[doc_id]
+        return SimpleNamespace(deleted_count=len(ids))
+
+    async def count_documents(self, query: Dict) -> int:
+        await self._round_trip()
+        return sum(1 for doc in self._docs.values() if matches(doc, query))
+
+    async def create_indexes(self, indexes: List) -> List[str]:
+        await self._round_trip()
+        self.indexes.extend(indexes)
+        return [index.document["name"] for index in indexes]
+
+
+class InMemoryDatabase:
+    """Attribute/item access to lazily created in-memory collections"""
+
+    def __init__(self, name: str = "benchmark", latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self._collections: Dict[str, InMemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(name, self.latency)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> InMemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def command(self, name, *args, **kwargs) -> Dict:
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        if name == "ping":
+            return {"ok": 1.0}
+        if name == "explain":
+            return {"queryPlanner": {"namespace": self.name, "winningPlan": {"stage": "MEMORY"}}}
+        raise NotImplementedError(f"Unsupported command {name}")
@@ -0,0 +1,106 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from metrics import REGISTRY, CallbackMetric, Counter, Histogram
+from rate_registry import RateSnapshot, current_snapshot, set_snapshot
+from serialization import dumps
+
+COMPUTE_QUEUE_WAIT = REGISTRY.register(Histogram(
+    "compute_queue_wait_seconds", "Time heavy calculations waited for a compute worker", ("task",)
+))
+COMPUTE_DURATION = REGISTRY.register(Histogram(
+    "compute_run_duration_seconds", "Time heavy calculations ran on a compute worker", ("task",)
+))
+COMPUTE_REJECTED = REGISTRY.register(Counter(
+    "compute_rejected_total", "Heavy calculations rejected because the compute queue was full", ("task",)
+))
+
+
+class ComputeOverloaded(RuntimeError):
+    pass
+
+
+def _timed_call(snapshot: Optional[RateSnapshot], fn: Callable, args: Tuple, kwargs: Dict) -> Tuple[float, Any]:
+    """Runs in the worker: returns (monotonic start time, result).
+
+    Process workers don't see the server's rate refreshes, so the caller's
+    snapshot travels with each task. CLOCK_MONOTONIC is system-wide, so start
+    times are comparable across processes.
+    """
+    started = time.monotonic()
+    if snapshot is not None:
+        set_snapshot(snapshot)
+    return started, fn(*args, **kwargs)
+
+
+def _serialized(fn: Callable, *args, **kwargs) -> bytes:
+    return dumps(fn(*args, **kwargs))
+
+
+class ComputeExecutor:
+    """Runs heavy calculations on a bounded thread or process pool.
+
+    At most max_pending tasks are queued or running; beyond that run() raises
+    ComputeOverloaded instead of queueing, so a calculation spike sheds load
+    rather than growing latency for everyone. kind="inline" runs on the
+    caller's thread, which is useful in tests and single-core deployments.
+    """
+
+    def __init__(self, kind: str = "thread", workers: Optional[int] = None, max_pending: int = 64):
+        if kind not in ("thread", "process", "inline"):
+            raise ValueError(f"Unknown compute executor kind {kind!r}")
+        self.kind = kind
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending
+        self.pending = 0
+        self._pool: Optional[Executor] = None
+        REGISTRY.register(CallbackMetric(
+            "compute_pending", "Heavy calculations queued or running", "gauge", (), lambda: [((), self.pending)]
+        ))
+
+    def _executor(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                # spawn: forking a process that already runs an event loop and
+                # motor's threads is not safe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="compute")
+        return self._pool
+
+    async def run(self, task: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the pool, recording queue wait and run time under task"""
+        if self.pending >= self.max_pending:
+            COMPUTE_REJECTED.inc(task)
+            raise ComputeOverloaded(f"Compute queue full ({self.max_pending} pending)")
+        self.pending += 1
+        submitted = time.monotonic()
+        try:
+            if self.kind == "inline":
+                started, result = submitted, fn(*args, **kwargs)
+            else:
+                snapshot = current_snapshot() if self.kind == "process" else None
+                started, result = await asyncio.get_running_loop().run_in_executor(
+                    self._executor(), functools.partial(_timed_call, snapshot, fn, args, kwargs)
+                )
+            COMPUTE_QUEUE_WAIT.observe(started - submitted, task)
+            COMPUTE_DURATION.observe(time.monotonic() - started, task)
+            return result
+        finally:
+            self.pending -= 1
+
+    async def run_json(self, task: str, fn: Callable, *args, **kwargs) -> bytes:
+        """Like run(), but also serializes the result on the worker"""
+        return await self.run(task, _serialized, fn, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,43 @@
+import asyncio
+import os
+from typing import Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+# Connection pool settings, read when the client is created rather than at import.
+# Unset optional ones fall back to the driver defaults.
+_POOL_SETTINGS = (
+    ("MONGO_MAX_POOL_SIZE", "maxPoolSize", "100"),
+    ("MONGO_MIN_POOL_SIZE", "minPoolSize", "0"),
+    ("MONGO_MAX_IDLE_TIME_MS", "maxIdleTimeMS", None),
+    ("MONGO_WAIT_QUEUE_TIMEOUT_MS", "waitQueueTimeoutMS", None),
+    ("MONGO_CONNECT_TIMEOUT_MS", "connectTimeoutMS", None),
+    # Fail fast instead of the driver's 30s when Mongo is unreachable
+    ("MONGO_SERVER_SELECTION_TIMEOUT_MS", "serverSelectionTimeoutMS", "5000"),
+)
+
+
+def mongo_client_options() -> Dict[str, int]:
+    """Pool sizing and timeouts for AsyncIOMotorClient from the MONGO_* environment"""
+    options = {}
+    for variable, option, default in _POOL_SETTINGS:
+        value = os.environ.get(variable, default)
+        if value:
+            options[option] = int(value)
+    return options
+
+
+def create_client(event_listeners: Optional[List] = None) -> AsyncIOMotorClient:
+    """Motor client for MONGO_URL; connections are opened lazily on first use"""
+    return AsyncIOMotorClient(
+        os.environ['MONGO_URL'], event_listeners=event_listeners or [], **mongo_client_options()
+    )
+
+
+def get_database(client: AsyncIOMotorClient) -> AsyncIOMotorDatabase:
+    return client[os.environ['DB_NAME']]
+
+
+async def ping(db, timeout: float = 2.0) -> None:
+    """Raise unless the database answers a ping within timeout seconds"""
+    await asyncio.wait_for(db.command("ping"), timeout)
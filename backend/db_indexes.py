@@ -0,0 +1,116 @@
+import logging
+from datetime import datetime
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from analytics import ANALYTICS_FIELDS, ANALYTICS_PROJECTION
+from http_caching import if_match_filter
+from pagination import PLAN_LIST_SORT, PLAN_PAGE_SIZE, keyset_filter, encode_cursor
+from plan_history import HISTORY_PAGE_SIZE, restore_projection
+from plan_patch import merge_patch_update
+
+logger = logging.getLogger(__name__)
+
+# Indexes each collection needs for the queries issued by server.py
+INDEXES: Dict[str, List[IndexModel]] = {
+    "financial_plans": [
+        # Plan listings: equality on user_id, keyset sort on (created_at, _id)
+        IndexModel(
+            [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="user_id_created_at"
+        ),
+    ],
+    "plan_history": [
+        # Version listings and reconstruction: a plan's deltas/snapshots by version
+        IndexModel(
+            [("plan_id", ASCENDING), ("kind", ASCENDING), ("version", DESCENDING)],
+            name="plan_id_kind_version"
+        ),
+    ],
+}
+
+
+async def ensure_indexes(db) -> None:
+    """Create any missing indexes; existing ones with the same spec are a no-op"""
+    for collection_name, indexes in INDEXES.items():
+        try:
+            names = await db[collection_name].create_indexes(indexes)
+            logger.info(f"Ensured indexes on {collection_name}: {', '.join(names)}")
+        except Exception as e:
+            logger.error(f"Error creating indexes on {collection_name}: {str(e)}")
+
+
+def _plan_stages(plan: Dict) -> List[Dict]:
+    """Flatten a query plan tree into its stages"""
+    stages = [plan]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+def summarize_explain(explain: Dict) -> Dict:
+    planner = explain.get("queryPlanner", {})
+    winning_plan = planner.get("winningPlan", {})
+    stages = _plan_stages(winning_plan)
+    return {
+        "namespace": planner.get("namespace"),
+        "uses_collection_scan": any(stage.get("stage") == "COLLSCAN" for stage in stages),
+        "stages": [stage.get("stage") for stage in stages],
+        "indexes": sorted({stage["indexName"] for stage in stages if "indexName" in stage}),
+        "winning_plan": winning_plan,
+    }
+
+
+def _find_and_modify_explain(db, command: Dict):
+    return db.command("explain", {"findAndModify": "financial_plans", **command}, verbosity="queryPlanner")
+
+
+async def explain_route_queries(db, user_id: str = "explain-user", plan_id: str = "explain-plan") -> Dict:
+    """Run explain() for the queries behind each plan, history and analytics route"""
+    plans = db.financial_plans
+    history = db.plan_history
+    page_cursor = encode_cursor({"created_at": datetime.utcnow(), "_id": plan_id})
+    list_query = {"user_id": user_id}
+    # The list route's default page, read with its one-plan lookahead
+    page_limit = PLAN_PAGE_SIZE + 1
+    # The same update, If-Match guard and BEFORE projection as _update_plan
+    mongo_update = merge_patch_update({"profile": {"age": 30}}).to_mongo(datetime.utcnow())
+    guarded_query = {"_id": plan_id, **if_match_filter('"v1", "t1700000000000"')}
+
+    explains = {
+        "GET /api/plans/{user_id}": await plans.find(list_query).sort(PLAN_LIST_SORT).limit(page_limit).explain(),
+        "GET /api/plans/{user_id}?cursor": await plans.find(
+            keyset_filter(list_query, page_cursor)
+        ).sort(PLAN_LIST_SORT).limit(page_limit).explain(),
+        "GET /api/plan/{plan_id}": await plans.find({"_id": plan_id}).limit(1).explain(),
+        "PUT/PATCH /api/plan/{plan_id} (If-Match)": await _find_and_modify_explain(db, {
+            "query": guarded_query,
+            "update": mongo_update,
+            "fields": restore_projection(mongo_update, ANALYTICS_FIELDS),
+            "new": False,
+        }),
+        "DELETE /api/plan/{plan_id}": await _find_and_modify_explain(db, {
+            "query": {"_id": plan_id}, "remove": True, "fields": ANALYTICS_PROJECTION,
+        }),
+        "DELETE /api/plan/{plan_id} (history)": await db.command(
+            "explain",
+            {"delete": "plan_history", "deletes": [{"q": {"plan_id": plan_id}, "limit": 0}]},
+            verbosity="queryPlanner"
+        ),
+        "GET /api/plan/{plan_id}/history": await history.find(
+            {"plan_id": plan_id, "kind": "delta"}
+        ).sort("version", -1).limit(HISTORY_PAGE_SIZE).explain(),
+        "GET /api/plan/{plan_id}/history?version (snapshot)": await history.find(
+            {"plan_id": plan_id, "kind": "snapshot", "version": {"$gte": 1, "$lt": 10}}
+        ).sort("version", 1).limit(1).explain(),
+        "GET /api/plan/{plan_id}/history?version (deltas)": await history.find(
+            {"plan_id": plan_id, "kind": "delta", "version": {"$gte": 1, "$lt": 10}}
+        ).sort("version", -1).explain(),
+        # One document per cohort, so a collection scan here is expected
+        "GET /api/analytics/cohorts": await db.plan_cohorts.find({"plans": {"$gt": 0}}).explain(),
+    }
+    return {route: summarize_explain(explain) for route, explain in explains.items()}
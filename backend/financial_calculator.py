@@ -1,14 +1,17 @@
 import math
-from typing import Dict, Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
 
-# Constants
-INFLATION_RATE = 0.06  # 6% for India
-SUKANYA_RATE = 0.08  # 8%
-PPF_RATE = 0.071  # 7.1%
-NPS_EXPECTED_RETURN = 0.10  # 10% (equity heavy)
-MF_INDEX_RETURN = 0.12  # 12%
-MF_ACTIVE_RETURN = 0.14  # 14%
-GOLD_RETURN = 0.08  # 8%
+import numpy as np
+
+# Rates (INFLATION_RATE, SUKANYA_RATE, PPF_RATE, NPS_EXPECTED_RETURN, ...) come
+# from the scheme rate registry, which is loaded from Mongo at startup
+from rate_registry import current_rates
+from metrics import NULL_STAGE_CLOCK, plan_stage_clock
+from plan_types import (
+    PlanResult, TermInsuranceResult, HealthInsuranceResult, EmergencyFundResult,
+    NPSResult, ChildPlanResult, AffordabilityResult
+)
 
 class FinancialCalculator:
     
@@ -138,7 +141,7 @@ class FinancialCalculator:
             }
         
         # Future value of annuity due (payments at start of year) - 8% rate
-        r = SUKANYA_RATE
+        r = current_rates()["SUKANYA_RATE"]
         n = years_to_maturity
         
         # FV for investment period
@@ -165,7 +168,7 @@ class FinancialCalculator:
         # Assumed return = 7%
         
         # Future value of annuity due
-        r = PPF_RATE  # 7.1%
+        r = current_rates()["PPF_RATE"]  # 7.1%
         n = years
         
         maturity_value = yearly_deposit * (((math.pow(1 + r, n) - 1) / r) * (1 + r))
@@ -194,8 +197,58 @@ class FinancialCalculator:
         return round(future_value, 2)
     
     @staticmethod
-    def calculate_goal_requirement(amount_today: float, years: int, inflation: float = INFLATION_RATE) -> Dict:
+    def simulate_sip_returns(
+        monthly_sip: float,
+        years: int,
+        annual_return: float,
+        volatility: Optional[float] = None,
+        paths: int = 10000,
+        seed: Optional[int] = None,
+        percentiles: Sequence[int] = (10, 50, 90)
+    ) -> Dict:
+        """Monte Carlo SIP projection returning corpus percentiles across simulated paths"""
+        if volatility is None:
+            volatility = current_rates()["MF_VOLATILITY"]
+        months = years * 12
+        result = {
+            "paths": paths,
+            "seed": seed,
+            "expected_return": annual_return * 100,
+            "volatility": volatility * 100,
+        }
+        if months <= 0 or paths <= 0 or monthly_sip <= 0:
+            result.update({f"p{p}": 0 for p in percentiles})
+            return result
+        
+        # Lognormal monthly returns whose mean matches the deterministic monthly rate
+        sigma = volatility / math.sqrt(12)
+        mu = math.log1p(annual_return / 12) - 0.5 * sigma * sigma
+        
+        # Antithetic draws halve the random number generation and reduce variance.
+        # Layout is (months, paths) so the cumulative sum runs over contiguous rows.
+        rng = np.random.default_rng(seed)
+        half = (paths + 1) // 2
+        draws = rng.standard_normal((months, half), dtype=np.float32)
+        log_growth = np.concatenate((draws, -draws), axis=1)[:, :paths]
+        log_growth *= sigma
+        log_growth += mu
+        
+        # The instalment paid at the start of month t compounds over months t..end,
+        # so sum log-growth from the end backwards and add up every instalment's growth
+        np.cumsum(log_growth[::-1], axis=0, out=log_growth)
+        np.exp(log_growth, out=log_growth)
+        corpus = log_growth.sum(axis=0, dtype=np.float64) * monthly_sip
+        
+        values = np.percentile(corpus, percentiles)
+        result.update({f"p{p}": round(float(v), 2) for p, v in zip(percentiles, values)})
+        return result
+    
+    @staticmethod
+    def calculate_goal_requirement(amount_today: float, years: int, inflation: Optional[float] = None) -> Dict:
         """Calculate inflation-adjusted goal requirement with simple formula"""
+        if inflation is None:
+            inflation = current_rates()["INFLATION_RATE"]
+        
         # Step 1: Inflate goal
         # Future Cost = Amount × (1.06 ^ years)
         future_cost = amount_today * math.pow(1 + inflation, years)
@@ -216,6 +269,49 @@ class FinancialCalculator:
             "inflation_rate": inflation * 100
         }
     
+    @staticmethod
+    def budget_suggestions(available_savings: float, essential_total: float,
+                           important_total: float, child_plans_monthly: float) -> List[Dict]:
+        """Priority-based suggestions for a plan that exceeds the budget"""
+        suggestions = []
+        
+        # Generate suggestions based on deficit
+        if available_savings < essential_total:
+            suggestions.append({
+                "priority": "critical",
+                "message": f"Your available savings (₹{available_savings:.0f}) are less than essential protection (₹{essential_total:.0f}). Consider increasing income or reducing expenses."
+            })
+        elif available_savings < (essential_total + important_total):
+            suggestions.append({
+                "priority": "high",
+                "message": f"Focus on essentials first. Consider reducing or delaying child education plans until income increases."
+            })
+            # Suggest adjusted child plans
+            if child_plans_monthly > 0:
+                reduced_child = max(0, available_savings - essential_total)
+                suggestions.append({
+                    "priority": "medium",
+                    "message": f"Reduce child plan contributions to ₹{reduced_child:.0f}/month temporarily."
+                })
+        else:
+            # Can afford essential + important, adjust optional
+            available_for_optional = available_savings - essential_total - important_total
+            suggestions.append({
+                "priority": "medium",
+                "message": f"Allocate ₹{available_for_optional:.0f}/month to wealth building (mutual funds, gold)."
+            })
+            
+            # Suggest proportion
+            if available_for_optional > 0:
+                mf_percent = 0.7
+                gold_percent = 0.3
+                suggestions.append({
+                    "priority": "low",
+                    "message": f"Suggested allocation: ₹{available_for_optional * mf_percent:.0f} mutual funds, ₹{available_for_optional * gold_percent:.0f} gold."
+                })
+        
+        return suggestions
+    
     @staticmethod
     def adjust_plan_to_budget(plan: Dict, available_savings: float) -> Dict:
         """Adjust plan based on available monthly savings"""
@@ -252,114 +348,152 @@ class FinancialCalculator:
             "child_plans": sum([cp["yearly_deposit"] for cp in wealth["child_plans"]]) / 12 if wealth["child_plans"] else 0,
         }
         
-        optional = {
-            "mutual_funds": wealth["mutual_funds"]["monthly_sip"],
-            "gold": wealth["gold"]["monthly_amount"],
-            "stocks": wealth["stocks"]["monthly_amount"] if wealth.get("stocks") else 0,
-        }
-        
-        essential_total = sum(essential.values())
-        important_total = sum(important.values())
-        optional_total = sum(optional.values())
-        
-        # Generate suggestions based on deficit
-        if available_savings < essential_total:
-            adjustments["suggestions"].append({
-                "priority": "critical",
-                "message": f"Your available savings (₹{available_savings:.0f}) are less than essential protection (₹{essential_total:.0f}). Consider increasing income or reducing expenses."
-            })
-        elif available_savings < (essential_total + important_total):
-            adjustments["suggestions"].append({
-                "priority": "high",
-                "message": f"Focus on essentials first. Consider reducing or delaying child education plans until income increases."
-            })
-            # Suggest adjusted child plans
-            if important["child_plans"] > 0:
-                reduced_child = max(0, available_savings - essential_total)
-                adjustments["suggestions"].append({
-                    "priority": "medium",
-                    "message": f"Reduce child plan contributions to ₹{reduced_child:.0f}/month temporarily."
-                })
-        else:
-            # Can afford essential + important, adjust optional
-            available_for_optional = available_savings - essential_total - important_total
-            adjustments["suggestions"].append({
-                "priority": "medium",
-                "message": f"Allocate ₹{available_for_optional:.0f}/month to wealth building (mutual funds, gold)."
-            })
-            
-            # Suggest proportion
-            if available_for_optional > 0:
-                mf_percent = 0.7
-                gold_percent = 0.3
-                adjustments["suggestions"].append({
-                    "priority": "low",
-                    "message": f"Suggested allocation: ₹{available_for_optional * mf_percent:.0f} mutual funds, ₹{available_for_optional * gold_percent:.0f} gold."
-                })
-        
+        adjustments["suggestions"] = FinancialCalculator.budget_suggestions(
+            available_savings, sum(essential.values()), sum(important.values()), important["child_plans"]
+        )
         return adjustments
     
     @staticmethod
-    def calculate_comprehensive_plan(profile_data: dict) -> Dict:
-        """Calculate complete 20-year financial plan"""
-        age = profile_data["age"]
-        monthly_income = profile_data["monthly_income"]
-        monthly_expenses = profile_data["monthly_expenses"]
+    def assess_affordability(plan: PlanResult) -> AffordabilityResult:
+        """Same rules as adjust_plan_to_budget, read straight off the typed plan"""
+        available_savings = plan.available_monthly_savings
+        required = plan.total_monthly_savings
+        if required <= available_savings:
+            return AffordabilityResult()
+        
+        essential_total = (
+            plan.emergency_fund.monthly_contribution +
+            plan.term_insurance.yearly_cost / 12 +
+            plan.health_insurance.yearly_cost / 12
+        )
+        child_plans_monthly = plan.child_plans_yearly / 12 if plan.child_plans else 0
+        important_total = plan.nps_plan.monthly_contribution + child_plans_monthly
+        return AffordabilityResult(
+            is_affordable=False,
+            deficit=required - available_savings,
+            suggestions=FinancialCalculator.budget_suggestions(
+                available_savings, essential_total, important_total, child_plans_monthly
+            )
+        )
+    
+    @staticmethod
+    def build_term_insurance(profile_data: dict) -> TermInsuranceResult:
+        """Term insurance block of the plan.
+        
+        Same rules as calculate_term_insurance_coverage (20x cover till age 80,
+        0.8% premium) without building the ranges the plan doesn't show.
+        """
+        recommended_cover = profile_data["monthly_income"] * 12 * 20
+        return TermInsuranceResult(
+            cover_amount=round(recommended_cover, 2),
+            tenure=80 - profile_data["age"],
+            yearly_cost=round(recommended_cover * 0.008, 2)
+        )
+    
+    @staticmethod
+    def build_health_insurance(profile_data: dict) -> HealthInsuranceResult:
+        """Health insurance block of the plan"""
         family_size = profile_data["family_size"]
+        health_insurance = FinancialCalculator.calculate_health_insurance(family_size)
+        return HealthInsuranceResult(
+            cover_amount=health_insurance["cover_amount"],
+            family_size=family_size,
+            yearly_cost=health_insurance["yearly_cost"]
+        )
+    
+    @staticmethod
+    def build_emergency_fund(profile_data: dict) -> EmergencyFundResult:
+        """Emergency fund block of the plan"""
+        emergency_fund = FinancialCalculator.calculate_emergency_fund(profile_data["monthly_expenses"])
+        return EmergencyFundResult(
+            required_amount=emergency_fund["required_amount"],
+            monthly_contribution=emergency_fund["monthly_contribution"],
+            build_period=emergency_fund["build_period"]
+        )
+    
+    @staticmethod
+    def build_nps_plan(profile_data: dict) -> NPSResult:
+        """Retirement (NPS) block of the plan"""
+        retirement = FinancialCalculator.calculate_retirement_corpus(profile_data["monthly_expenses"], profile_data["age"])
+        return NPSResult(
+            target_corpus=retirement["target_corpus"],
+            monthly_contribution=retirement["monthly_contribution"],
+            years_to_retirement=retirement["years_to_retirement"]
+        )
+    
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _sukanya_child_plan(daughter_age: int, yearly_deposit: float, rate: float) -> ChildPlanResult:
+        """Sukanya plan for one daughter age; rate is part of the key so rate changes miss"""
+        sukanya = FinancialCalculator.calculate_sukanya_samriddhi(daughter_age, yearly_deposit)
+        return ChildPlanResult(
+            scheme_name="Sukanya Samriddhi Yojana",
+            yearly_deposit=sukanya["yearly_deposit"],
+            monthly_equivalent=sukanya["monthly_equivalent"],
+            maturity_value=sukanya["maturity_value"],
+            years_to_maturity=sukanya["years_to_maturity"]
+        )
+    
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _ppf_child_plan(yearly_deposit: float, rate: float) -> ChildPlanResult:
+        ppf = FinancialCalculator.calculate_ppf(yearly_deposit)
+        return ChildPlanResult(
+            scheme_name="PPF",
+            yearly_deposit=ppf["yearly_deposit"],
+            monthly_equivalent=ppf["monthly_equivalent"],
+            maturity_value=ppf["maturity_value"],
+            years_to_maturity=15
+        )
+    
+    @staticmethod
+    def build_child_plans(profile_data: dict) -> List[ChildPlanResult]:
+        """Sukanya / PPF plans for the children in the profile.
+        
+        Child plans only depend on the daughter's age and the scheme rates, so
+        they are memoized and shared between plans; treat them as read-only.
+        """
         has_daughter = profile_data.get("has_daughter", False)
         daughter_age = profile_data.get("daughter_age")
         has_son = profile_data.get("has_son", False)
-        risk_comfort = profile_data.get("risk_comfort", "Medium")
-        
-        # Calculate annual income
-        annual_income = monthly_income * 12
-        
-        # Calculate available monthly savings
-        available_monthly_savings = monthly_income - monthly_expenses
-        
-        # 1. Protection
-        term_insurance = FinancialCalculator.calculate_term_insurance_coverage(annual_income, age)
-        health_insurance = FinancialCalculator.calculate_health_insurance(family_size)
         
-        # 2. Emergency Fund
-        emergency_fund = FinancialCalculator.calculate_emergency_fund(monthly_expenses)
-        
-        # 3. Retirement (NPS)
-        retirement = FinancialCalculator.calculate_retirement_corpus(monthly_expenses, age)
-        
-        # 4. Child Plans
         child_plans = []
         if has_daughter and daughter_age is not None and daughter_age < 10:
             # Sukanya: Max yearly deposit = ₹1.5 lakh
             sukanya_deposit = 150000  # Max amount
-            sukanya = FinancialCalculator.calculate_sukanya_samriddhi(daughter_age, sukanya_deposit)
-            child_plans.append({
-                "scheme_name": "Sukanya Samriddhi Yojana",
-                "yearly_deposit": sukanya["yearly_deposit"],
-                "monthly_equivalent": sukanya["monthly_equivalent"],
-                "maturity_value": sukanya["maturity_value"],
-                "years_to_maturity": sukanya["years_to_maturity"]
-            })
+            child_plans.append(FinancialCalculator._sukanya_child_plan(
+                daughter_age, sukanya_deposit, current_rates()["SUKANYA_RATE"]
+            ))
         
         if has_son:
             # PPF: Suggested yearly deposit = ₹50,000 – ₹1,00,000 (using 50k)
             ppf_deposit = 50000
-            ppf = FinancialCalculator.calculate_ppf(ppf_deposit)
-            child_plans.append({
-                "scheme_name": "PPF",
-                "yearly_deposit": ppf["yearly_deposit"],
-                "monthly_equivalent": ppf["monthly_equivalent"],
-                "maturity_value": ppf["maturity_value"],
-                "years_to_maturity": 15
-            })
+            child_plans.append(FinancialCalculator._ppf_child_plan(ppf_deposit, current_rates()["PPF_RATE"]))
+        
+        return child_plans
+    
+    @staticmethod
+    def assemble_plan(
+        profile_data: dict,
+        term_insurance: TermInsuranceResult,
+        health_insurance: HealthInsuranceResult,
+        emergency_fund: EmergencyFundResult,
+        nps_plan: NPSResult,
+        child_plans: List[ChildPlanResult],
+        clock=NULL_STAGE_CLOCK
+    ) -> PlanResult:
+        """Derive surplus, wealth allocations and affordability from the component blocks"""
+        monthly_income = profile_data["monthly_income"]
+        monthly_expenses = profile_data["monthly_expenses"]
+        risk_comfort = profile_data.get("risk_comfort", "Medium")
         
         # 5. Calculate surplus for wealth building
         monthly_commitments = (
-            term_insurance["yearly_cost_range"]["min"] / 12 +
-            health_insurance["yearly_cost"] / 12 +
-            emergency_fund["monthly_contribution"] +
-            retirement["monthly_contribution"] +
-            sum([cp["yearly_deposit"] for cp in child_plans]) / 12
+            term_insurance.yearly_cost / 12 +
+            health_insurance.yearly_cost / 12 +
+            emergency_fund.monthly_contribution +
+            nps_plan.monthly_contribution +
+            sum(cp.yearly_deposit for cp in child_plans) / 12
         )
         
         surplus = monthly_income - monthly_expenses - monthly_commitments
@@ -376,92 +510,55 @@ class FinancialCalculator:
         if risk_comfort == "High" and surplus > mf_amount + gold_amount:
             stock_amount = min(surplus * 0.15, surplus - mf_amount - gold_amount)
         
-        return {
-            "protection": {
-                "term_insurance": {
-                    "cover_amount": term_insurance["recommended_cover"],
-                    "tenure": term_insurance["tenure"],
-                    "yearly_cost": term_insurance["yearly_cost_range"]["min"],
-                    "riders": term_insurance["riders"]
-                },
-                "health_insurance": {
-                    "cover_amount": health_insurance["cover_amount"],
-                    "family_size": family_size,
-                    "yearly_cost": health_insurance["yearly_cost"]
-                }
-            },
-            "wealth": {
-                "emergency_fund": emergency_fund,
-                "nps_plan": {
-                    "target_corpus": retirement["target_corpus"],
-                    "monthly_contribution": retirement["monthly_contribution"],
-                    "expected_value": retirement["target_corpus"],
-                    "years_to_retirement": retirement["years_to_retirement"]
-                },
-                "child_plans": child_plans,
-                "mutual_funds": {
-                    "monthly_sip": round(mf_amount, 2),
-                    "index_allocation": round(mf_amount * 0.6, 2),
-                    "active_allocation": round(mf_amount * 0.4, 2),
-                    "expected_return": 13.0,
-                    "projected_value": mf_future_value
-                },
-                "gold": {
-                    "monthly_amount": round(gold_amount, 2),
-                    "percentage": 7.5
-                },
-                "stocks": {
-                    "monthly_amount": round(stock_amount, 2),
-                    "percentage": 15.0,
-                    "risk_disclaimer": True
-                } if stock_amount > 0 else None
-            },
-            "total_monthly_savings": round(monthly_commitments + mf_amount + gold_amount + stock_amount, 2),
-            "surplus": round(surplus, 2),
-            "available_monthly_savings": round(available_monthly_savings, 2),
-            "affordability": FinancialCalculator.adjust_plan_to_budget(
-                {
-                    "protection": {
-                        "term_insurance": {
-                            "cover_amount": term_insurance["recommended_cover"],
-                            "tenure": term_insurance["tenure"],
-                            "yearly_cost": term_insurance["yearly_cost_range"]["min"],
-                            "riders": term_insurance["riders"]
-                        },
-                        "health_insurance": {
-                            "cover_amount": health_insurance["cover_amount"],
-                            "family_size": family_size,
-                            "yearly_cost": health_insurance["yearly_cost"]
-                        }
-                    },
-                    "wealth": {
-                        "emergency_fund": emergency_fund,
-                        "nps_plan": {
-                            "target_corpus": retirement["target_corpus"],
-                            "monthly_contribution": retirement["monthly_contribution"],
-                            "expected_value": retirement["target_corpus"],
-                            "years_to_retirement": retirement["years_to_retirement"]
-                        },
-                        "child_plans": child_plans,
-                        "mutual_funds": {
-                            "monthly_sip": round(mf_amount, 2),
-                            "index_allocation": round(mf_amount * 0.6, 2),
-                            "active_allocation": round(mf_amount * 0.4, 2),
-                            "expected_return": 13.0,
-                            "projected_value": mf_future_value
-                        },
-                        "gold": {
-                            "monthly_amount": round(gold_amount, 2),
-                            "percentage": 7.5
-                        },
-                        "stocks": {
-                            "monthly_amount": round(stock_amount, 2),
-                            "percentage": 15.0,
-                            "risk_disclaimer": True
-                        } if stock_amount > 0 else None
-                    },
-                    "total_monthly_savings": round(monthly_commitments + mf_amount + gold_amount + stock_amount, 2)
-                },
-                available_monthly_savings
-            )
-        }
\ No newline at end of file
+        plan = PlanResult(
+            term_insurance=term_insurance,
+            health_insurance=health_insurance,
+            emergency_fund=emergency_fund,
+            nps_plan=nps_plan,
+            child_plans=child_plans,
+            mf_monthly_sip=mf_amount,
+            mf_projected_value=mf_future_value,
+            gold_monthly_amount=gold_amount,
+            stock_monthly_amount=stock_amount,
+            total_monthly_savings=round(monthly_commitments + mf_amount + gold_amount + stock_amount, 2),
+            surplus=surplus,
+            available_monthly_savings=monthly_income - monthly_expenses
+        )
+        clock.lap("surplus_allocation")
+        
+        # 9. Affordability
+        plan.affordability = FinancialCalculator.assess_affordability(plan)
+        clock.lap("affordability")
+        return plan
+    
+    @staticmethod
+    def compute_plan(profile_data: dict) -> PlanResult:
+        """Calculate complete 20-year financial plan as a typed PlanResult"""
+        clock = plan_stage_clock()
+        
+        # 1. Protection
+        term_insurance = FinancialCalculator.build_term_insurance(profile_data)
+        health_insurance = FinancialCalculator.build_health_insurance(profile_data)
+        clock.lap("protection")
+        
+        # 2. Emergency Fund
+        emergency_fund = FinancialCalculator.build_emergency_fund(profile_data)
+        clock.lap("emergency_fund")
+        
+        # 3. Retirement (NPS)
+        nps_plan = FinancialCalculator.build_nps_plan(profile_data)
+        clock.lap("retirement")
+        
+        # 4. Child Plans
+        child_plans = FinancialCalculator.build_child_plans(profile_data)
+        clock.lap("child_plans")
+        
+        # 5-9. Surplus, wealth allocations and affordability
+        return FinancialCalculator.assemble_plan(
+            profile_data, term_insurance, health_insurance, emergency_fund, nps_plan, child_plans, clock
+        )
+    
+    @staticmethod
+    def calculate_comprehensive_plan(profile_data: dict) -> Dict:
+        """Calculate complete 20-year financial plan"""
+        return FinancialCalculator.compute_plan(profile_data).to_dict()
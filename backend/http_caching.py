@@ -0,0 +1,75 @@
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from fastapi import Response
+
+# Enough of a plan to compute its ETag without fetching the whole document
+PLAN_ETAG_PROJECTION = {"_id": 1, "version": 1, "updated_at": 1}
+
+# Plans are private and change rarely: let clients keep them but always revalidate
+PLAN_CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
+
+
+def _revision(doc: Dict) -> str:
+    """What changes whenever the stored plan changes: its version, else updated_at"""
+    if doc.get("version") is not None:
+        return f"v{doc['version']}"
+    updated_at = doc.get("updated_at")
+    if isinstance(updated_at, datetime):
+        # Mongo keeps milliseconds, so this survives a round-trip
+        return f"t{updated_at.replace(tzinfo=timezone.utc).timestamp() * 1000:.0f}"
+    return f"t{updated_at}"
+
+
+def _quoted_digest(parts: Iterable[str]) -> str:
+    digest = hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def plan_etag(doc: Dict) -> str:
+    """Strong ETag naming the plan's revision, so If-Match maps straight onto a query"""
+    return f'"{_revision(doc)}"'
+
+
+def if_match_filter(if_match: str) -> Optional[Dict]:
+    """Query conditions equivalent to an If-Match header, or None if no tag can match.
+
+    Weak tags are accepted, because the compression middleware weakens the
+    ETags of compressed responses.
+    """
+    conditions = []
+    for tag in if_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag == "*":
+            return {}
+        revision = tag.strip('"')
+        if revision.startswith("v") and revision[1:].isdigit():
+            conditions.append({"version": int(revision[1:])})
+        elif revision.startswith("t") and revision[1:].isdigit():
+            updated_at = datetime.fromtimestamp(int(revision[1:]) / 1000, tz=timezone.utc).replace(tzinfo=None)
+            conditions.append({"version": {"$exists": False}, "updated_at": updated_at})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$or": conditions}
+
+
+def plan_list_etag(docs: Iterable[Dict], *request_parts: str) -> str:
+    """ETag for a page of plans: the page's request parameters plus each plan's revision"""
+    parts = list(request_parts)
+    for doc in docs:
+        parts.append(str(doc["_id"]))
+        parts.append(_revision(doc))
+    return _quoted_digest(parts)
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
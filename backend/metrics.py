@@ -0,0 +1,271 @@
+import bisect
+import itertools
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+# Prometheus text exposition format, version 0.0.4
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; request latencies span sub-millisecond cache hits to multi-second batches
+REQUEST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Calculator stages take microseconds
+STAGE_BUCKETS = (0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.001, 0.01)
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect plus two increments under a lock"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = REQUEST_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count], running sum
+        self._counts: Dict[Tuple, List[int]] = {}
+        self._sums: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[index] += 1
+            self._sums[labels] += value
+
+    def count(self, *labels) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(counts), self._sums[labels]) for labels, counts in self._counts.items()]
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """Values read at scrape time, for state other modules already track (cache stats)"""
+
+    def __init__(self, name: str, documentation: str, metric_type: str, labelnames: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[Sequence[str], float]]]):
+        self.name = name
+        self.documentation = documentation
+        self.metric_type = metric_type
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for labels, value in self.callback():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.collect())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template and status",
+    ("method", "route", "status")
+))
+MONGO_LATENCY = REGISTRY.register(Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency by collection and command",
+    ("collection", "command", "outcome")
+))
+
+# A whole plan takes ~20us, so timing every stage of every plan would cost
+# more than the stages themselves; time 1 in N plans instead (0 disables).
+PLAN_STAGE_SAMPLE_EVERY = int(os.environ.get("PLAN_STAGE_SAMPLE_EVERY", "16"))
+
+PLAN_STAGE_LATENCY = REGISTRY.register(Histogram(
+    "plan_stage_duration_seconds",
+    f"Time spent in each calculate_comprehensive_plan stage (sampled 1 in {PLAN_STAGE_SAMPLE_EVERY} plans)",
+    ("stage",), buckets=STAGE_BUCKETS
+))
+
+
+class StageClock:
+    """Records the time since the previous lap under the given stage name"""
+    __slots__ = ("_last",)
+
+    def __init__(self):
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        now = time.perf_counter()
+        PLAN_STAGE_LATENCY.observe(now - self._last, stage)
+        self._last = now
+
+
+class _NullStageClock:
+    __slots__ = ()
+
+    def lap(self, stage: str) -> None:
+        pass
+
+
+NULL_STAGE_CLOCK = _NullStageClock()
+_plan_counter = itertools.count()
+
+
+def plan_stage_clock():
+    """A StageClock for sampled plans, a no-op clock for the rest"""
+    if PLAN_STAGE_SAMPLE_EVERY and next(_plan_counter) % PLAN_STAGE_SAMPLE_EVERY == 0:
+        return StageClock()
+    return NULL_STAGE_CLOCK
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware counting requests per route template, method and status.
+
+    Labels use the matched route's path template (/api/plan/{plan_id}), never
+    the raw path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            labels = (scope["method"], template, str(status_code))
+            HTTP_LATENCY.observe(time.perf_counter() - started, *labels)
+            HTTP_REQUESTS.inc(*labels)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Feeds MONGO_LATENCY from pymongo's command monitoring events"""
+
+    def __init__(self):
+        # (connection, request id) -> collection; succeeded/failed events don't carry the command
+        self._collections: Dict[Tuple, str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name == "getMore":
+            # {"getMore": <cursor id>, "collection": <name>}
+            target = event.command.get("collection")
+        else:
+            target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else "-"
+        self._collections[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event, outcome: str) -> None:
+        collection = self._collections.pop((event.connection_id, event.request_id), "-")
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, collection, event.command_name, outcome)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, "success")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, "failure")
+
+
+def render_metrics() -> bytes:
+    return REGISTRY.render()
+
+
+def register_cache_metrics(name: str, stats: Callable[[], Dict], prefix: Optional[str] = None) -> None:
+    """Expose a cache's stats() counters and size as plan_cache_* style metrics"""
+    prefix = prefix or name
+
+    def counters():
+        current = stats()
+        return [((event,), current[event]) for event in ("hits", "misses", "stale", "evictions", "expirations", "rate_flushes")
+                if event in current]
+
+    REGISTRY.register(CallbackMetric(
+        f"{prefix}_events_total", f"{name} hits, misses, evictions and expirations", "counter", ("event",), counters
+    ))
+    REGISTRY.register(CallbackMetric(
+        f"{prefix}_entries", f"Entries currently held in {name}", "gauge", (), lambda: [((), stats()["size"])]
+    ))
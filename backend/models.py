@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
 
@@ -123,6 +123,11 @@ class FinancialPlanCreate(BaseModel):
     user_id: str
     profile: ProfileData
 
+class PlanDeltaRequest(BaseModel):
+    profile: ProfileData  # Profile the previous plan was calculated from
+    previous_plan: Dict[str, Any]
+    changes: Dict[str, Any]  # Subset of ProfileData fields with their new values
+
 class FinancialPlanResponse(BaseModel):
     id: str = Field(alias="_id")
     user_id: str
@@ -143,4 +148,7 @@ class SchemeRate(BaseModel):
     interest_rate: float
     tax_benefit: str
     description: str
+    rate_key: Optional[str] = None  # Calculator lookup name, e.g. PPF_RATE
+    tenure: Optional[str] = None
+    listed: bool = True  # Shown by /api/scheme-rates
     last_updated: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
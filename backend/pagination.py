@@ -0,0 +1,44 @@
+import base64
+import json
+from datetime import datetime
+from typing import Dict, Optional
+
+# Plans are listed newest first; _id breaks ties between equal timestamps
+PLAN_LIST_SORT = [("created_at", -1), ("_id", -1)]
+
+# Default page size of the plan list; a page reads one extra plan to tell if there's a next one
+PLAN_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(doc: Dict) -> str:
+    """Opaque keyset cursor pointing just past the given document"""
+    payload = {"t": doc["created_at"].isoformat(), "id": doc["_id"]}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return {"created_at": datetime.fromisoformat(payload["t"]), "_id": payload["id"]}
+    except Exception as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+def keyset_filter(base: Dict, cursor: Optional[str]) -> Dict:
+    """Add the (created_at, _id) keyset condition for the page after the cursor"""
+    if not cursor:
+        return base
+    position = decode_cursor(cursor)
+    return {
+        **base,
+        "$or": [
+            {"created_at": {"$lt": position["created_at"]}},
+            {"created_at": position["created_at"], "_id": {"$lt": position["_id"]}},
+        ]
+    }
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from rate_registry import current_snapshot
+
+
+def current_rates_fingerprint() -> str:
+    """Version of the rates (INFLATION_RATE, SUKANYA_RATE, PPF_RATE, ...) the calculator is using right now"""
+    return current_snapshot().version
+
+
+def normalize_profile(profile: dict) -> dict:
+    """Drop details the calculator ignores so equivalent profiles share a key"""
+    normalized = dict(profile)
+    normalized["monthly_income"] = float(normalized["monthly_income"])
+    normalized["monthly_expenses"] = float(normalized["monthly_expenses"])
+    if not normalized.get("has_daughter"):
+        normalized["daughter_age"] = None
+    if not normalized.get("has_son"):
+        normalized["son_age"] = None
+    return normalized
+
+
+def canonical_key(payload: Any, rates_version: str = "") -> str:
+    """Stable hash of a JSON-compatible payload plus the rates it was computed with"""
+    encoded = json.dumps([payload, rates_version], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after a fixed TTL"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether an entry is held, expired or not; doesn't count as a hit or miss"""
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class PlanCalculationCache:
+    """Memoizes calculate_comprehensive_plan results per canonical profile"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300.0):
+        self._cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._rates = current_rates_fingerprint()
+        self.flushes = 0
+
+    def _check_rates(self) -> str:
+        rates = current_rates_fingerprint()
+        if rates != self._rates:
+            self._cache.clear()
+            self._rates = rates
+            self.flushes += 1
+        return rates
+
+    def key_for(self, profile: dict) -> str:
+        return canonical_key(normalize_profile(profile), self._check_rates())
+
+    def get_or_compute(self, profile: dict, compute: Callable[[dict], Dict]) -> Dict:
+        """Return the cached plan for this profile, computing it on a miss.
+
+        Cached plans are shared between requests, so callers must not mutate them.
+        """
+        key = self.key_for(profile)
+        plan = self._cache.get(key)
+        if plan is None:
+            plan = compute(profile)
+            self._cache.set(key, plan)
+        return plan
+
+    def stats(self) -> Dict:
+        stats = self._cache.stats()
+        stats["rate_flushes"] = self.flushes
+        return stats
+
+
+class PlanDocumentCache:
+    """Encoded plan documents by id, each tagged with the ETag it was encoded at.
+
+    An entry is only served when the caller's freshly read revision still
+    matches, so a write through another worker is noticed on the next read;
+    writes through this worker also drop the entry straight away.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl_seconds: float = 300.0):
+        self._cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.stale = 0
+        self.cold_misses = 0
+
+    def holds(self, plan_id: str) -> bool:
+        """Whether a copy is held that's worth validating; none held counts as a miss"""
+        if plan_id in self._cache:
+            return True
+        self.cold_misses += 1
+        return False
+
+    def get(self, plan_id: str, etag: str) -> Optional[bytes]:
+        entry = self._cache.get(plan_id)
+        if entry is None:
+            return None
+        cached_etag, body = entry
+        if cached_etag != etag:
+            self._cache.pop(plan_id)
+            self.stale += 1
+            return None
+        return body
+
+    def set(self, plan_id: str, etag: str, body: bytes) -> None:
+        self._cache.set(plan_id, (etag, body))
+
+    def invalidate(self, plan_id: str) -> None:
+        self._cache.pop(plan_id)
+
+    def stats(self) -> Dict:
+        stats = self._cache.stats()
+        # A stale entry was found but not served
+        stats["hits"] -= self.stale
+        stats["misses"] += self.stale + self.cold_misses
+        stats["stale"] = self.stale
+        return stats
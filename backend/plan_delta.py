@@ -0,0 +1,99 @@
+from typing import Any, Dict, Iterable, List, Tuple
+
+from financial_calculator import FinancialCalculator
+from plan_types import (
+    TermInsuranceResult, HealthInsuranceResult, EmergencyFundResult, NPSResult, ChildPlanResult
+)
+
+# Plan component -> (builder taking the full profile, loader for the previous plan's dict)
+COMPONENT_BUILDERS = {
+    "protection.term_insurance": (FinancialCalculator.build_term_insurance, TermInsuranceResult.from_dict),
+    "protection.health_insurance": (FinancialCalculator.build_health_insurance, HealthInsuranceResult.from_dict),
+    "wealth.emergency_fund": (FinancialCalculator.build_emergency_fund, EmergencyFundResult.from_dict),
+    "wealth.nps_plan": (FinancialCalculator.build_nps_plan, NPSResult.from_dict),
+    "wealth.child_plans": (
+        FinancialCalculator.build_child_plans,
+        lambda plans: [ChildPlanResult.from_dict(cp) for cp in plans]
+    ),
+}
+
+# Profile field -> plan components computed from it. Surplus, mutual funds,
+# gold, stocks and affordability are derived from the components (plus income,
+# expenses and risk_comfort) and are re-derived on every delta.
+PROFILE_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+    "age": ("protection.term_insurance", "wealth.nps_plan"),
+    "monthly_income": ("protection.term_insurance",),
+    "monthly_expenses": ("wealth.emergency_fund", "wealth.nps_plan"),
+    "family_size": ("protection.health_insurance",),
+    "has_daughter": ("wealth.child_plans",),
+    "daughter_age": ("wealth.child_plans",),
+    "has_son": ("wealth.child_plans",),
+    "son_age": (),
+    "has_dependents": (),
+    "risk_comfort": (),
+}
+
+
+def dirty_components(changed_fields: Iterable[str]) -> List[str]:
+    dirty = []
+    for field in changed_fields:
+        for component in PROFILE_DEPENDENCIES[field]:
+            if component not in dirty:
+                dirty.append(component)
+    return dirty
+
+
+def _get_path(plan: Dict, path: str) -> Any:
+    value = plan
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def changed_paths(old: Any, new: Any, prefix: str = "") -> List[str]:
+    """Dotted paths of the leaves that differ between two plans"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        paths = []
+        for key in list(old.keys()) + [k for k in new.keys() if k not in old]:
+            path = f"{prefix}.{key}" if prefix else str(key)
+            paths.extend(changed_paths(old.get(key), new.get(key), path))
+        return paths
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        paths = []
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            paths.extend(changed_paths(old_item, new_item, f"{prefix}.{index}"))
+        return paths
+    return [] if old == new else [prefix]
+
+
+def recompute_plan_delta(profile: Dict, previous_plan: Dict, changed_fields: List[str]) -> Tuple[Dict, List[str]]:
+    """Rebuild only the components that depend on the changed profile fields.
+
+    profile must already include the changes. Components missing from the
+    previous plan are rebuilt as well; reused ones keep the rates they were
+    computed with.
+    """
+    dirty = set(dirty_components(changed_fields))
+
+    components = {}
+    for component, (builder, load) in COMPONENT_BUILDERS.items():
+        previous = _get_path(previous_plan, component)
+        if component in dirty or previous is None:
+            components[component] = builder(profile)
+        else:
+            try:
+                components[component] = load(previous)
+            except (KeyError, TypeError):
+                components[component] = builder(profile)
+
+    plan = FinancialCalculator.assemble_plan(
+        profile,
+        components["protection.term_insurance"],
+        components["protection.health_insurance"],
+        components["wealth.emergency_fund"],
+        components["wealth.nps_plan"],
+        components["wealth.child_plans"]
+    ).to_dict()
+    return plan, changed_paths(previous_plan, plan)
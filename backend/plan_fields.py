@@ -0,0 +1,59 @@
+import re
+from typing import Dict, Optional, Tuple
+
+# Always returned: list pagination needs created_at/_id, ETags need version/updated_at
+PLAN_LIST_REQUIRED_FIELDS = ("_id", "created_at", "updated_at", "version")
+
+# Named field sets for the list screens, drawn from what a saved plan holds
+# (profile, protection, wealth, goals, total_monthly_savings)
+PLAN_VIEWS = {
+    "summary": (
+        "user_id",
+        "profile.age",
+        "profile.monthly_income",
+        "profile.monthly_expenses",
+        "profile.risk_comfort",
+        "total_monthly_savings",
+        "wealth.emergency_fund.required_amount",
+        "wealth.nps_plan.monthly_contribution",
+        "wealth.mutual_funds.monthly_sip",
+        "protection.term_insurance.cover_amount",
+        "protection.health_insurance.cover_amount",
+    ),
+}
+
+_FIELD_PATH = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+
+class InvalidFieldSelection(ValueError):
+    pass
+
+
+def plan_list_projection(fields: Optional[str], view: Optional[str]) -> Tuple[Optional[Dict], str]:
+    """Mongo projection for ?fields=a,b.c and/or ?view=, plus a canonical form for ETags.
+
+    Returns (None, "") when neither is given, meaning whole documents. A path
+    nested under another selected path is dropped, since Mongo rejects
+    overlapping projections and the parent already includes it.
+    """
+    if not fields and not view:
+        return None, ""
+    selected = set()
+    if view:
+        if view not in PLAN_VIEWS:
+            raise InvalidFieldSelection(f"Unknown view {view!r}; expected one of {', '.join(PLAN_VIEWS)}")
+        selected.update(PLAN_VIEWS[view])
+    for path in (fields or "").split(","):
+        path = path.strip()
+        if not path:
+            continue
+        if not _FIELD_PATH.match(path):
+            raise InvalidFieldSelection(f"Invalid field {path!r}")
+        selected.add(path)
+    selected.update(PLAN_LIST_REQUIRED_FIELDS)
+
+    kept = []
+    for path in sorted(selected):
+        if not any(path.startswith(parent + ".") for parent in kept):
+            kept.append(path)
+    return {path: 1 for path in kept}, ",".join(kept)
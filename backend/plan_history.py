@@ -0,0 +1,154 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from plan_patch import MISSING, apply_update, get_path
+
+# History is stored as reverse deltas: the live plan is always the newest
+# version, and each update records how to turn version n + 1 back into n using
+# only the old values of the paths it touched, read atomically by the update
+# itself (find_one_and_update returning the projected BEFORE document). Every
+# snapshot_every versions a full copy is stored too, so rebuilding any version
+# applies at most snapshot_every deltas.
+
+
+def _restorable_path(path: str) -> str:
+    """Mongo can't project array elements by index, so restore the whole array"""
+    segments = path.split(".")
+    for index, segment in enumerate(segments):
+        if segment.isdigit() and index > 0:
+            return ".".join(segments[:index])
+    return path
+
+
+def _outermost(paths: Iterable[str]) -> List[str]:
+    """Drop paths nested under another one; projections reject the overlap"""
+    kept = []
+    for path in sorted(set(paths)):
+        # Not just the last one kept: "profile-x" sorts between "profile" and "profile.age"
+        if not any(path.startswith(parent + ".") for parent in kept):
+            kept.append(path)
+    return kept
+
+
+def _touched_paths(mongo_update: Dict) -> List[str]:
+    return _outermost(_restorable_path(path) for fields in mongo_update.values() for path in fields)
+
+
+def restore_projection(mongo_update: Dict, extra_paths: Iterable[str] = ()) -> Dict:
+    """Projection for the BEFORE document: old values of every touched path plus the version.
+
+    extra_paths lets other consumers of the BEFORE document (analytics) read
+    more fields in the same round-trip.
+    """
+    projection = {path: 1 for path in _outermost([*_touched_paths(mongo_update), *extra_paths])}
+    projection.update({"_id": 1, "version": 1, "updated_at": 1})
+    return projection
+
+
+def _missing_root(before: Dict, path: str) -> str:
+    """Outermost part of a missing path that was missing too; the update created everything below it"""
+    segments = path.split(".")
+    for end in range(1, len(segments)):
+        prefix = ".".join(segments[:end])
+        if get_path(before, prefix) is MISSING:
+            return prefix
+    return path
+
+
+def reverse_update(before: Dict, mongo_update: Dict) -> Dict:
+    """Update that turns the updated plan back into `before`"""
+    restore: Dict[str, Dict] = {"$set": {}, "$unset": {}}
+    unset = []
+    for path in _touched_paths(mongo_update):
+        old = get_path(before, path)
+        if old is MISSING:
+            unset.append(_missing_root(before, path))
+        else:
+            restore["$set"][path] = old
+    restore["$unset"] = {path: "" for path in _outermost(unset)}
+    return {op: fields for op, fields in restore.items() if fields}
+
+
+def _changed_paths(mongo_update: Dict) -> List[str]:
+    return sorted({
+        path for fields in mongo_update.values() for path in fields
+        if path not in ("version", "updated_at")
+    })
+
+
+async def record_update(db, plan_id: str, before: Dict, mongo_update: Dict, snapshot_every: int) -> None:
+    """Store the reverse delta for an applied update and, every snapshot_every versions, a snapshot"""
+    version = before.get("version") or 0
+    await db.plan_history.insert_one({
+        "_id": f"{plan_id}:delta:{version}",
+        "plan_id": plan_id,
+        "kind": "delta",
+        "version": version,
+        "updated_at": before.get("updated_at"),
+        "changed": _changed_paths(mongo_update),
+        "restore": reverse_update(before, mongo_update),
+        "recorded_at": datetime.utcnow(),
+    })
+    if snapshot_every > 0 and (version + 1) % snapshot_every == 0:
+        # A concurrent update may already have moved on; the snapshot is
+        # labelled with whatever version it actually captured
+        current = await db.financial_plans.find_one({"_id": plan_id})
+        if current is not None:
+            await db.plan_history.update_one(
+                {"_id": f"{plan_id}:snapshot:{current.get('version') or 0}"},
+                {"$setOnInsert": {
+                    "plan_id": plan_id,
+                    "kind": "snapshot",
+                    "version": current.get("version") or 0,
+                    "document": current,
+                    "recorded_at": datetime.utcnow(),
+                }},
+                upsert=True
+            )
+
+
+# Default number of versions the history route lists
+HISTORY_PAGE_SIZE = 100
+
+
+async def list_history(db, plan_id: str, limit: int = HISTORY_PAGE_SIZE) -> List[Dict]:
+    """Newest-first summary of the recorded versions before the current one"""
+    entries = await db.plan_history.find(
+        {"plan_id": plan_id, "kind": "delta"}, {"version": 1, "updated_at": 1, "changed": 1, "_id": 0}
+    ).sort("version", -1).limit(limit).to_list(limit)
+    return entries
+
+
+async def reconstruct_version(db, plan_id: str, version: int) -> Optional[Dict]:
+    """The plan as it was at `version`, or None if the plan or that part of its history is gone"""
+    head = await db.financial_plans.find_one({"_id": plan_id})
+    if head is None:
+        return None
+    head_version = head.get("version") or 0
+    if version == head_version:
+        return head
+    if version < 0 or version > head_version:
+        return None
+
+    document, start = head, head_version
+    snapshots = await db.plan_history.find(
+        {"plan_id": plan_id, "kind": "snapshot", "version": {"$gte": version, "$lt": head_version}}
+    ).sort("version", 1).limit(1).to_list(1)
+    if snapshots:
+        document, start = snapshots[0]["document"], snapshots[0]["version"]
+        if start == version:
+            return document
+
+    deltas = await db.plan_history.find(
+        {"plan_id": plan_id, "kind": "delta", "version": {"$gte": version, "$lt": start}}
+    ).sort("version", -1).to_list(None)
+    if [delta["version"] for delta in deltas] != list(range(start - 1, version - 1, -1)):
+        # Older than the first recorded update, or a delta was never written
+        return None
+    for delta in deltas:
+        apply_update(document, delta["restore"])
+    return document
+
+
+async def delete_history(db, plan_id: str) -> None:
+    await db.plan_history.delete_many({"plan_id": plan_id})
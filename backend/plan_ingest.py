@@ -0,0 +1,158 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from pymongo.errors import BulkWriteError
+
+BULK_CHUNK_SIZE = 1000
+
+
+def _supplied_timestamp(value) -> Optional[datetime]:
+    """A migrated plan's datetime or ISO 8601 string as naive UTC, like utcnow(); None if absent"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            raise ValueError(f"Invalid timestamp {value!r}")
+    if not isinstance(value, datetime):
+        raise ValueError(f"Invalid timestamp {value!r}")
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def prepare_plan(plan_data: dict, keep_id: bool = False) -> dict:
+    """Stamp a plan document with its id, timestamps and first version before insert.
+
+    With keep_id (migrations), a supplied string _id and created_at/updated_at
+    are kept, so migrated plans keep their history and listing order; invalid
+    timestamps raise ValueError.
+    """
+    now = datetime.utcnow()
+    created_at = updated_at = None
+    if keep_id:
+        created_at = _supplied_timestamp(plan_data.get("created_at"))
+        updated_at = _supplied_timestamp(plan_data.get("updated_at"))
+    if not (keep_id and isinstance(plan_data.get("_id"), str) and plan_data["_id"]):
+        plan_data["_id"] = str(uuid.uuid4())
+    plan_data["created_at"] = created_at or now
+    plan_data["updated_at"] = updated_at or created_at or now
+    plan_data["version"] = 1
+    return plan_data
+
+
+# Each item is either a parsed plan or the error explaining why it could not be parsed
+ParsedItem = Union[dict, Exception]
+
+InsertedCallback = Callable[[List[dict]], Awaitable[None]]
+
+
+def parse_json_array(body: bytes) -> List[ParsedItem]:
+    items = json.loads(body)
+    if not isinstance(items, list):
+        raise ValueError("Expected a JSON array of plans")
+    return [item if isinstance(item, dict) else ValueError("Plan must be a JSON object") for item in items]
+
+
+async def parse_ndjson_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedItem]:
+    """Yield one parsed plan per non-empty line as the request body arrives"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+
+def _parse_line(line: bytes) -> ParsedItem:
+    try:
+        item = json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {e}")
+    if not isinstance(item, dict):
+        return ValueError("Plan must be a JSON object")
+    return item
+
+
+class BulkInsertReport:
+    """Per-item outcome of a bulk plan insert"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.results: List[Dict] = []
+
+    def succeeded(self, index: int, plan_id: str) -> None:
+        self.inserted += 1
+        self.results.append({"index": index, "id": plan_id, "ok": True})
+
+    def failure(self, index: int, error: str, plan_id: str = None) -> None:
+        self.failed += 1
+        self.results.append({"index": index, "id": plan_id, "ok": False, "error": error})
+
+    def to_dict(self) -> Dict:
+        self.results.sort(key=lambda r: r["index"])
+        return {"inserted": self.inserted, "failed": self.failed, "results": self.results}
+
+
+async def _insert_chunk(collection, chunk: List[Tuple[int, dict]], report: BulkInsertReport,
+                        on_inserted: Optional[InsertedCallback]) -> None:
+    docs = [doc for _, doc in chunk]
+    failed = {}
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            failed[error["index"]] = error.get("errmsg", "Write error")
+    for position, (index, doc) in enumerate(chunk):
+        if position in failed:
+            report.failure(index, failed[position], doc["_id"])
+        else:
+            report.succeeded(index, doc["_id"])
+    if on_inserted is not None:
+        await on_inserted([doc for position, doc in enumerate(docs) if position not in failed])
+
+
+async def insert_plans_bulk(collection, items: Union[Iterable[ParsedItem], AsyncIterator[ParsedItem]],
+                            chunk_size: int = BULK_CHUNK_SIZE,
+                            on_inserted: Optional[InsertedCallback] = None) -> BulkInsertReport:
+    """Insert plans with unordered insert_many in fixed-size chunks.
+
+    Plans that carry a string _id keep it, so re-running a migration reports
+    duplicates instead of creating copies. on_inserted, if given, is awaited
+    with each chunk's successfully inserted documents.
+    """
+    report = BulkInsertReport()
+    chunk: List[Tuple[int, dict]] = []
+
+    async def consume(index: int, item: ParsedItem) -> None:
+        if isinstance(item, Exception):
+            report.failure(index, str(item))
+            return
+        try:
+            chunk.append((index, prepare_plan(item, keep_id=True)))
+        except ValueError as e:
+            report.failure(index, str(e), item.get("_id") if isinstance(item.get("_id"), str) else None)
+            return
+        if len(chunk) >= chunk_size:
+            await _insert_chunk(collection, chunk, report, on_inserted)
+            chunk.clear()
+
+    if hasattr(items, "__aiter__"):
+        index = 0
+        async for item in items:
+            await consume(index, item)
+            index += 1
+    else:
+        for index, item in enumerate(items):
+            await consume(index, item)
+
+    if chunk:
+        await _insert_chunk(collection, chunk, report, on_inserted)
+    return report
@@ -0,0 +1,269 @@
+import copy
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List
+
+MERGE_PATCH_TYPE = "application/merge-patch+json"
+JSON_PATCH_TYPE = "application/json-patch+json"
+
+# Maintained by the server; full-document PUTs may echo them back, patches may not touch them
+SERVER_FIELDS = ("_id", "created_at", "updated_at", "version")
+
+
+class PatchError(ValueError):
+    pass
+
+
+@dataclass(slots=True)
+class PlanUpdate:
+    """A plan edit as Mongo update operators, plus test conditions for the filter"""
+    set_fields: Dict[str, Any] = field(default_factory=dict)
+    unset_fields: List[str] = field(default_factory=list)
+    push_fields: Dict[str, Dict] = field(default_factory=dict)
+    conditions: Dict[str, Any] = field(default_factory=dict)
+
+    def _check_conflicts(self) -> None:
+        """Mongo rejects an update touching a path and its parent (or the same path twice)"""
+        paths = list(self.set_fields) + self.unset_fields + list(self.push_fields)
+        seen = set()
+        for path in paths:
+            if path in seen:
+                raise PatchError(f"Conflicting changes to {path}")
+            seen.add(path)
+        for path in paths:
+            segments = path.split(".")
+            for end in range(1, len(segments)):
+                parent = ".".join(segments[:end])
+                if parent in seen:
+                    raise PatchError(f"Conflicting changes to {parent} and {path}")
+
+    def to_mongo(self, now: datetime) -> Dict:
+        """Update document that applies the edit, stamps updated_at and bumps version"""
+        self._check_conflicts()
+        update: Dict[str, Dict] = {"$set": {**self.set_fields, "updated_at": now}, "$inc": {"version": 1}}
+        if self.unset_fields:
+            update["$unset"] = {path: "" for path in self.unset_fields}
+        if self.push_fields:
+            update["$push"] = dict(self.push_fields)
+        return update
+
+
+def _check_field(path: str) -> None:
+    if not path or path.split(".")[0] in SERVER_FIELDS:
+        raise PatchError(f"{path or '/'} cannot be modified")
+    for segment in path.split("."):
+        if not segment or segment.startswith("$"):
+            raise PatchError(f"Invalid field name in {path}")
+
+
+def replace_fields_update(body: Dict) -> PlanUpdate:
+    """Legacy PUT: top-level fields in the body replace the stored ones"""
+    update = PlanUpdate()
+    for key, value in body.items():
+        if key in SERVER_FIELDS:
+            continue
+        _check_field(key)
+        update.set_fields[key] = value
+    return update
+
+
+def merge_patch_update(patch: Dict) -> PlanUpdate:
+    """RFC 7396 merge patch: null removes a member, objects merge, anything else replaces.
+
+    Nested objects become dotted $set paths, so only the leaves that changed are
+    written; an empty object changes nothing, as merging {} into an object is a
+    no-op. An object patched onto a stored non-object is rejected by Mongo
+    rather than replaced, since the stored value isn't read first.
+    """
+    if not isinstance(patch, dict):
+        raise PatchError("Merge patch must be a JSON object")
+    update = PlanUpdate()
+
+    def walk(members: Dict, prefix: str) -> None:
+        for key, value in members.items():
+            path = f"{prefix}.{key}" if prefix else key
+            _check_field(path)
+            if value is None:
+                update.unset_fields.append(path)
+            elif isinstance(value, dict):
+                walk(value, path)
+            else:
+                update.set_fields[path] = value
+
+    walk(patch, "")
+    return update
+
+
+def pointer_to_path(pointer: str) -> str:
+    """JSON Pointer (RFC 6901) to a Mongo dotted path"""
+    if not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer {pointer!r}")
+    segments = [s.replace("~1", "/").replace("~0", "~") for s in pointer[1:].split("/")]
+    if any("." in segment for segment in segments):
+        raise PatchError(f"Field names containing '.' are not supported: {pointer}")
+    path = ".".join(segments)
+    _check_field(path)
+    return path
+
+
+def _member(expr: Any, key: str) -> Dict:
+    """Expression for expr[key]: missing unless expr is an object"""
+    return {"$cond": [
+        {"$eq": [{"$type": expr}, "object"]},
+        {"$let": {"vars": {"o": expr}, "in": f"$$o.{key}"}},
+        "$$REMOVE",
+    ]}
+
+
+def _at_segment(expr: Any, segment: str) -> Dict:
+    """Expression for one JSON Pointer step: an array index or an object member"""
+    if not segment.isdigit():
+        return _member(expr, segment)
+    return {"$cond": [{"$isArray": expr}, {"$arrayElemAt": [expr, int(segment)]}, _member(expr, segment)]}
+
+
+def _equals(expr: Any, value: Any) -> List[Dict]:
+    """Conditions for RFC 6902 equality of expr and value.
+
+    A bare $eq would compare subdocuments member-order-sensitively, so objects
+    and arrays are compared by type, size and member by member instead. The
+    type checks come first; $and stops at the first false condition, so
+    $size/$objectToArray only ever see the type they need.
+    """
+    if isinstance(value, dict):
+        conditions = [
+            {"$eq": [{"$type": expr}, "object"]},
+            {"$eq": [{"$size": {"$objectToArray": expr}}, len(value)]},
+        ]
+        for key, item in value.items():
+            if not key or "." in key or key.startswith("$"):
+                raise PatchError(f"Unsupported member name {key!r} in test value")
+            conditions.extend(_equals(_member(expr, key), item))
+        return conditions
+    if isinstance(value, list):
+        conditions = [{"$isArray": expr}, {"$eq": [{"$size": expr}, len(value)]}]
+        for index, item in enumerate(value):
+            conditions.extend(_equals({"$arrayElemAt": [expr, index]}, item))
+        return conditions
+    if value is None:
+        # $eq would also match a missing member
+        return [{"$eq": [{"$type": expr}, "null"]}]
+    if isinstance(value, bool):
+        return [{"$eq": [{"$type": expr}, "bool"]}, {"$eq": [expr, value]}]
+    if isinstance(value, (int, float)):
+        # Numerically equal across int/long/double, as JSON numbers are
+        return [{"$isNumber": expr}, {"$eq": [expr, value]}]
+    if isinstance(value, str):
+        # $literal: a string starting with "$" would otherwise read as a field path
+        return [{"$eq": [{"$type": expr}, "string"]}, {"$eq": [expr, {"$literal": value}]}]
+    raise PatchError(f"Unsupported test value {value!r}")
+
+
+def equality_condition(path: str, value: Any) -> Dict:
+    """$expr condition for a JSON Patch test: the stored value at path equals value.
+
+    Unlike a query equality filter, this doesn't match an array that merely
+    contains the value or a missing field against null.
+    """
+    expr: Any = "$$ROOT"
+    for segment in path.split("."):
+        expr = _at_segment(expr, segment)
+    return {"$and": _equals(expr, value)}
+
+
+def json_patch_update(operations: List[Dict]) -> PlanUpdate:
+    """RFC 6902 JSON Patch restricted to what one atomic update can express.
+
+    add/replace become $set (add at an array index or "-" becomes $push with
+    $position), remove becomes $unset, and test becomes a condition in the
+    update filter (see equality_condition), so a failed test leaves the plan
+    untouched (tests see the stored plan, not the result of earlier
+    operations). move, copy and removing array elements would need the
+    current document, so they are rejected.
+    """
+    if not isinstance(operations, list):
+        raise PatchError("JSON Patch must be an array of operations")
+    update = PlanUpdate()
+    for operation in operations:
+        if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+            raise PatchError("Each operation needs 'op' and 'path'")
+        op = operation["op"]
+        path = pointer_to_path(operation["path"])
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise PatchError(f"'{op}' operation on {operation['path']} needs a value")
+        parent, _, last = path.rpartition(".")
+
+        if op == "add" and parent and (last == "-" or last.isdigit()):
+            push = {"$each": [operation["value"]]}
+            if last != "-":
+                push["$position"] = int(last)
+            if parent in update.push_fields:
+                raise PatchError(f"Only one insert per array is supported ({operation['path']})")
+            update.push_fields[parent] = push
+        elif op in ("add", "replace"):
+            update.set_fields[path] = operation["value"]
+        elif op == "remove":
+            if last.isdigit():
+                raise PatchError(f"Removing array elements is not supported ({operation['path']})")
+            update.unset_fields.append(path)
+        elif op == "test":
+            tests = update.conditions.setdefault("$expr", {"$and": []})["$and"]
+            tests.append(equality_condition(path, operation["value"]))
+        else:
+            raise PatchError(f"Unsupported JSON Patch operation {op!r}")
+    return update
+
+
+# Marks a path that doesn't exist, as opposed to one holding None
+MISSING = object()
+
+
+def get_path(doc: Dict, path: str) -> Any:
+    """Value at a dotted path (numeric segments index arrays), or MISSING"""
+    value = doc
+    for segment in path.split("."):
+        if isinstance(value, dict) and segment in value:
+            value = value[segment]
+        elif isinstance(value, list) and segment.isdigit() and int(segment) < len(value):
+            value = value[int(segment)]
+        else:
+            return MISSING
+    return value
+
+
+def _container(doc: Dict, path: str):
+    parent = doc
+    segments = path.split(".")
+    for segment in segments[:-1]:
+        if isinstance(parent, list):
+            parent = parent[int(segment)]
+        else:
+            parent = parent.setdefault(segment, {})
+    return parent, segments[-1]
+
+
+def apply_update(doc: Dict, update: Dict) -> Dict:
+    """Apply the $set/$unset/$inc/$push operators this module produces to a document in place"""
+    for path, value in update.get("$set", {}).items():
+        parent, key = _container(doc, path)
+        if isinstance(parent, list):
+            parent[int(key)] = copy.deepcopy(value)
+        else:
+            parent[key] = copy.deepcopy(value)
+    for path in update.get("$unset", {}):
+        parent = get_path(doc, path.rpartition(".")[0]) if "." in path else doc
+        key = path.rpartition(".")[2]
+        if isinstance(parent, dict):
+            parent.pop(key, None)
+        elif isinstance(parent, list) and key.isdigit() and int(key) < len(parent):
+            parent[int(key)] = None  # Mongo leaves a null in the array
+    for path, amount in update.get("$inc", {}).items():
+        parent, key = _container(doc, path)
+        parent[key] = (parent.get(key) or 0) + amount
+    for path, push in update.get("$push", {}).items():
+        parent, key = _container(doc, path)
+        items = parent.setdefault(key, [])
+        values = push["$each"] if isinstance(push, dict) and "$each" in push else [push]
+        position = push.get("$position", len(items)) if isinstance(push, dict) else len(items)
+        items[position:position] = copy.deepcopy(values)
+    return doc
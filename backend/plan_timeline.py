@@ -0,0 +1,114 @@
+import math
+from itertools import islice
+from typing import Dict, Iterator
+
+from rate_registry import current_rates
+from serialization import ndjson_line
+
+MF_SIP_RETURN = 0.13  # Same blended rate calculate_comprehensive_plan projects with
+RETIREMENT_AGE = 60
+PPF_TENURE_YEARS = 15
+# Rows per streamed chunk: Starlette iterates a sync body in the threadpool, one hop per chunk
+NDJSON_CHUNK_ROWS = 120
+
+
+def _monthly_rate_from_annual(annual_rate: float) -> float:
+    """Monthly rate that compounds to the given effective annual rate"""
+    return math.pow(1 + annual_rate, 1 / 12) - 1
+
+
+def iter_plan_timeline(profile: dict, plan: Dict, years: int = 20, granularity: str = "year") -> Iterator[Dict]:
+    """Yield the projected corpus per bucket, one row per year (or month).
+
+    Only the running balances are kept between rows, so memory does not grow
+    with the horizon. NPS contributions stop at RETIREMENT_AGE but the corpus
+    keeps compounding; the timeline doesn't model annuitisation or withdrawals.
+    """
+    wealth = plan["wealth"]
+    age = profile["age"]
+
+    nps_monthly = wealth["nps_plan"]["monthly_contribution"]
+    nps_months = max(RETIREMENT_AGE - age, 0) * 12
+    mf_monthly = wealth["mutual_funds"]["monthly_sip"]
+    gold_monthly = wealth["gold"]["monthly_amount"]
+    ef_monthly = wealth["emergency_fund"]["monthly_contribution"]
+    ef_required = wealth["emergency_fund"]["required_amount"]
+
+    sukanya_deposit = 0
+    sukanya_invest_years = 0
+    sukanya_maturity_years = 0
+    ppf_deposit = 0
+    for child_plan in wealth["child_plans"]:
+        if child_plan["scheme_name"] == "PPF":
+            ppf_deposit = child_plan["yearly_deposit"]
+        else:
+            daughter_age = profile.get("daughter_age") or 0
+            sukanya_deposit = child_plan["yearly_deposit"]
+            sukanya_invest_years = max(15 - daughter_age, 0)
+            sukanya_maturity_years = child_plan["years_to_maturity"]
+
+    rates = current_rates()
+    nps_rate = rates["NPS_EXPECTED_RETURN"] / 12
+    mf_rate = MF_SIP_RETURN / 12
+    gold_rate = rates["GOLD_RETURN"] / 12
+    sukanya_rate = _monthly_rate_from_annual(rates["SUKANYA_RATE"])
+    ppf_rate = _monthly_rate_from_annual(rates["PPF_RATE"])
+
+    nps = sukanya = ppf = mf = gold = emergency = 0.0
+    contributed = 0.0
+    monthly = granularity == "month"
+
+    for month in range(years * 12):
+        year_index, month_of_year = divmod(month, 12)
+
+        # Contributions land at the start of the period (annuity due)
+        if month < nps_months:
+            nps += nps_monthly
+            contributed += nps_monthly
+        mf += mf_monthly
+        gold += gold_monthly
+        contributed += mf_monthly + gold_monthly
+        if emergency < ef_required:
+            top_up = min(ef_monthly, ef_required - emergency)
+            emergency += top_up
+            contributed += top_up
+        if month_of_year == 0:
+            if year_index < sukanya_invest_years:
+                sukanya += sukanya_deposit
+                contributed += sukanya_deposit
+            if ppf_deposit and year_index < PPF_TENURE_YEARS:
+                ppf += ppf_deposit
+                contributed += ppf_deposit
+
+        # Growth; matured small-savings accounts stop compounding
+        nps *= 1 + nps_rate
+        mf *= 1 + mf_rate
+        gold *= 1 + gold_rate
+        if year_index < sukanya_maturity_years:
+            sukanya *= 1 + sukanya_rate
+        if year_index < PPF_TENURE_YEARS:
+            ppf *= 1 + ppf_rate
+
+        if monthly or month_of_year == 11:
+            row = {
+                "year": year_index + 1,
+                "age": age + year_index + 1 if month_of_year == 11 else age + year_index,
+                "nps": round(nps, 2),
+                "sukanya": round(sukanya, 2),
+                "ppf": round(ppf, 2),
+                "mutual_funds": round(mf, 2),
+                "gold": round(gold, 2),
+                "emergency_fund": round(emergency, 2),
+                "total": round(nps + sukanya + ppf + mf + gold + emergency, 2),
+                "total_contributed": round(contributed, 2),
+            }
+            if monthly:
+                row["month"] = month + 1
+            yield row
+
+
+def iter_ndjson(rows: Iterator[Dict], chunk_rows: int = NDJSON_CHUNK_ROWS) -> Iterator[bytes]:
+    """Encode rows as newline-delimited JSON, chunk_rows lines per yielded chunk"""
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_rows)):
+        yield b"".join(ndjson_line(row) for row in chunk)
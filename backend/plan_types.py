@@ -0,0 +1,180 @@
+# Internal plan representation filled in by FinancialCalculator. Plain slotted
+# dataclasses rather than pydantic models: they are built on every calculation,
+# skip validation, and are converted to the API dict shape only at the edge.
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+TERM_RIDERS = ("Critical Illness", "Accidental Death")
+EMERGENCY_FUND_TOOLS = ("Auto-sweep account", "Liquid fund")
+
+
+@dataclass(slots=True)
+class TermInsuranceResult:
+    cover_amount: float
+    tenure: int
+    yearly_cost: float
+
+    def to_dict(self) -> Dict:
+        return {
+            "cover_amount": self.cover_amount,
+            "tenure": self.tenure,
+            "yearly_cost": self.yearly_cost,
+            "riders": list(TERM_RIDERS)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TermInsuranceResult":
+        return cls(data["cover_amount"], data["tenure"], data["yearly_cost"])
+
+
+@dataclass(slots=True)
+class HealthInsuranceResult:
+    cover_amount: float
+    family_size: int
+    yearly_cost: float
+
+    def to_dict(self) -> Dict:
+        return {
+            "cover_amount": self.cover_amount,
+            "family_size": self.family_size,
+            "yearly_cost": self.yearly_cost
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "HealthInsuranceResult":
+        return cls(data["cover_amount"], data["family_size"], data["yearly_cost"])
+
+
+@dataclass(slots=True)
+class EmergencyFundResult:
+    required_amount: float
+    monthly_contribution: float
+    build_period: int
+
+    def to_dict(self) -> Dict:
+        return {
+            "required_amount": self.required_amount,
+            "monthly_contribution": self.monthly_contribution,
+            "build_period": self.build_period,
+            "tools": list(EMERGENCY_FUND_TOOLS)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "EmergencyFundResult":
+        return cls(data["required_amount"], data["monthly_contribution"], data["build_period"])
+
+
+@dataclass(slots=True)
+class NPSResult:
+    target_corpus: float
+    monthly_contribution: float
+    years_to_retirement: int
+
+    def to_dict(self) -> Dict:
+        return {
+            "target_corpus": self.target_corpus,
+            "monthly_contribution": self.monthly_contribution,
+            "expected_value": self.target_corpus,
+            "years_to_retirement": self.years_to_retirement
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "NPSResult":
+        return cls(data["target_corpus"], data["monthly_contribution"], data["years_to_retirement"])
+
+
+@dataclass(slots=True)
+class ChildPlanResult:
+    scheme_name: str
+    yearly_deposit: float
+    monthly_equivalent: float
+    maturity_value: float
+    years_to_maturity: int
+
+    def to_dict(self) -> Dict:
+        return {
+            "scheme_name": self.scheme_name,
+            "yearly_deposit": self.yearly_deposit,
+            "monthly_equivalent": self.monthly_equivalent,
+            "maturity_value": self.maturity_value,
+            "years_to_maturity": self.years_to_maturity
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ChildPlanResult":
+        return cls(
+            data["scheme_name"], data["yearly_deposit"], data["monthly_equivalent"],
+            data["maturity_value"], data["years_to_maturity"]
+        )
+
+
+@dataclass(slots=True)
+class AffordabilityResult:
+    is_affordable: bool = True
+    deficit: float = 0
+    suggestions: List[Dict] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {
+            "is_affordable": self.is_affordable,
+            "deficit": self.deficit,
+            "suggestions": self.suggestions,
+            "adjusted_plan": None
+        }
+
+
+@dataclass(slots=True)
+class PlanResult:
+    term_insurance: TermInsuranceResult
+    health_insurance: HealthInsuranceResult
+    emergency_fund: EmergencyFundResult
+    nps_plan: NPSResult
+    child_plans: List[ChildPlanResult]
+    mf_monthly_sip: float
+    mf_projected_value: float
+    gold_monthly_amount: float
+    stock_monthly_amount: float
+    total_monthly_savings: float
+    surplus: float
+    available_monthly_savings: float
+    affordability: Optional[AffordabilityResult] = None
+
+    @property
+    def child_plans_yearly(self) -> float:
+        return sum(cp.yearly_deposit for cp in self.child_plans)
+
+    def to_dict(self) -> Dict:
+        """API shape returned by /api/calculate-plan"""
+        mf_amount = self.mf_monthly_sip
+        stock_amount = self.stock_monthly_amount
+        return {
+            "protection": {
+                "term_insurance": self.term_insurance.to_dict(),
+                "health_insurance": self.health_insurance.to_dict()
+            },
+            "wealth": {
+                "emergency_fund": self.emergency_fund.to_dict(),
+                "nps_plan": self.nps_plan.to_dict(),
+                "child_plans": [cp.to_dict() for cp in self.child_plans],
+                "mutual_funds": {
+                    "monthly_sip": round(mf_amount, 2),
+                    "index_allocation": round(mf_amount * 0.6, 2),
+                    "active_allocation": round(mf_amount * 0.4, 2),
+                    "expected_return": 13.0,
+                    "projected_value": self.mf_projected_value
+                },
+                "gold": {
+                    "monthly_amount": round(self.gold_monthly_amount, 2),
+                    "percentage": 7.5
+                },
+                "stocks": {
+                    "monthly_amount": round(stock_amount, 2),
+                    "percentage": 15.0,
+                    "risk_disclaimer": True
+                } if stock_amount > 0 else None
+            },
+            "total_monthly_savings": self.total_monthly_savings,
+            "surplus": round(self.surplus, 2),
+            "available_monthly_savings": round(self.available_monthly_savings, 2),
+            "affordability": self.affordability.to_dict() if self.affordability else None
+        }
@@ -0,0 +1,90 @@
+import asyncio
+import cProfile
+import hmac
+import logging
+import random
+import re
+import threading
+import uuid
+from pathlib import Path
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def profile_filename(request_id: str) -> str:
+    """Request id made safe for use as a file name"""
+    return _UNSAFE_FILENAME_CHARS.sub("_", request_id)[:64] or uuid.uuid4().hex
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware that cProfiles selected requests to PROFILE_DIR/<request id>.pstats.
+
+    A request is profiled when it sends X-Profile matching the configured token
+    or when it falls in the random sample. Without a token the header is
+    ignored, so outside callers can't switch profiling on. The profile covers
+    the handler, FinancialCalculator calls and the time spent awaiting motor.
+    cProfile is per thread, so work for other requests that interleaves on the
+    event loop during those awaits shows up too. Only one request is profiled
+    at a time; others pass through untouched. Register the middleware only when
+    profiling is enabled, so there is no cost when it is off.
+    """
+
+    def __init__(self, app, directory: str, sample_rate: float = 0.0, token: Optional[str] = None):
+        self.app = app
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sample_rate = sample_rate
+        self.token = token
+        self._active = threading.Lock()
+
+    def _requested(self, scope) -> Tuple[Optional[str], Optional[str]]:
+        """(X-Profile value, X-Request-ID value) from the request headers"""
+        profile = request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                profile = value.decode("latin-1")
+            elif name == b"x-request-id":
+                request_id = value.decode("latin-1")
+        return profile, request_id
+
+    def _should_profile(self, profile_header: Optional[str]) -> bool:
+        if self.token and profile_header is not None and hmac.compare_digest(profile_header, self.token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile_header, request_id = self._requested(scope)
+        if not self._should_profile(profile_header) or not self._active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = request_id or uuid.uuid4().hex
+        path = self.directory / f"{profile_filename(request_id)}.pstats"
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", path.name.encode("latin-1"))]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+        finally:
+            self._active.release()
+
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, profiler.dump_stats, str(path))
+            logger.info(f"Wrote request profile {path}")
+        except Exception as e:
+            logger.error(f"Error writing request profile: {str(e)}")
@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional
+
+from models import SchemeRate
+
+logger = logging.getLogger(__name__)
+
+# Seed rows for the scheme_rates collection. interest_rate is a percentage,
+# rate_key is the name the calculator looks the rate up by, and only listed
+# rows are shown by /api/scheme-rates.
+DEFAULT_SCHEME_RATES: List[Dict] = [
+    {
+        "rate_key": "SUKANYA_RATE",
+        "scheme_name": "Sukanya Samriddhi Yojana",
+        "interest_rate": 8.0,
+        "description": "For girl child under 10 years",
+        "tenure": "21 years",
+        "tax_benefit": "Section 80C up to ₹1.5 lakh",
+    },
+    {
+        "rate_key": "PPF_RATE",
+        "scheme_name": "Public Provident Fund (PPF)",
+        "interest_rate": 7.1,
+        "description": "Long-term savings with tax benefits",
+        "tenure": "15 years (extendable)",
+        "tax_benefit": "Section 80C up to ₹1.5 lakh",
+    },
+    {
+        "rate_key": "NPS_EXPECTED_RETURN",
+        "scheme_name": "National Pension System (NPS)",
+        "interest_rate": 10.0,
+        "description": "Market-linked retirement savings",
+        "tenure": "Till age 60",
+        "tax_benefit": "Section 80C + 80CCD(1B) up to ₹2 lakh",
+    },
+    {
+        "rate_key": "INFLATION_RATE",
+        "scheme_name": "Inflation",
+        "interest_rate": 6.0,
+        "description": "Assumed consumer inflation for India",
+        "tax_benefit": "",
+        "listed": False,
+    },
+    {
+        "rate_key": "MF_INDEX_RETURN",
+        "scheme_name": "Index mutual funds",
+        "interest_rate": 12.0,
+        "description": "Assumed long-run index fund return",
+        "tax_benefit": "",
+        "listed": False,
+    },
+    {
+        "rate_key": "MF_ACTIVE_RETURN",
+        "scheme_name": "Active mutual funds",
+        "interest_rate": 14.0,
+        "description": "Assumed long-run active fund return",
+        "tax_benefit": "",
+        "listed": False,
+    },
+    {
+        "rate_key": "GOLD_RETURN",
+        "scheme_name": "Gold",
+        "interest_rate": 8.0,
+        "description": "Assumed long-run gold return",
+        "tax_benefit": "",
+        "listed": False,
+    },
+    {
+        "rate_key": "MF_VOLATILITY",
+        "scheme_name": "Mutual fund volatility",
+        "interest_rate": 18.0,
+        "description": "Annualised volatility used by Monte Carlo SIP projections",
+        "tax_benefit": "",
+        "listed": False,
+    },
+]
+
+
+class RateSnapshot:
+    """Immutable view of every rate plus the /api/scheme-rates payload built from it"""
+
+    def __init__(self, schemes: List[SchemeRate], fallback_rates: Optional[Mapping[str, float]] = None):
+        rates = dict(fallback_rates or {})
+        rates.update({
+            scheme.rate_key: round(scheme.interest_rate / 100, 10)
+            for scheme in schemes if scheme.rate_key
+        })
+        self.rates: Mapping[str, float] = MappingProxyType(rates)
+        self.listing = {
+            "schemes": [
+                {
+                    "name": scheme.scheme_name,
+                    "rate": scheme.interest_rate,
+                    "description": scheme.description,
+                    "tenure": scheme.tenure,
+                    "tax_benefit": scheme.tax_benefit
+                }
+                for scheme in schemes if scheme.listed
+            ]
+        }
+        encoded = json.dumps([dict(self.rates), self.listing], sort_keys=True, separators=(",", ":"))
+        self.version = hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+        self.etag = f'"{self.version}"'
+        self.loaded_at = datetime.utcnow()
+
+    def __getstate__(self) -> Dict:
+        # MappingProxyType doesn't pickle; snapshots are shipped to process workers
+        return {**self.__dict__, "rates": dict(self.rates)}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self.rates = MappingProxyType(state["rates"])
+
+
+def _default_schemes() -> List[SchemeRate]:
+    return [SchemeRate(**row) for row in DEFAULT_SCHEME_RATES]
+
+
+_snapshot = RateSnapshot(_default_schemes())
+_DEFAULT_RATES = _snapshot.rates
+_DEFAULT_ORDER = {row["rate_key"]: position for position, row in enumerate(DEFAULT_SCHEME_RATES)}
+
+
+def current_snapshot() -> RateSnapshot:
+    return _snapshot
+
+
+def current_rates() -> Mapping[str, float]:
+    """Rates as fractions keyed by name, e.g. current_rates()["PPF_RATE"] == 0.071"""
+    return _snapshot.rates
+
+
+def set_snapshot(snapshot: RateSnapshot) -> bool:
+    """Swap in a new snapshot; returns True when any rate or listing changed"""
+    global _snapshot
+    changed = snapshot.version != _snapshot.version
+    if changed:
+        _snapshot = snapshot
+    return changed
+
+
+async def seed_scheme_rates(db) -> None:
+    """Insert default rows that are missing without touching edited ones"""
+    for row in DEFAULT_SCHEME_RATES:
+        scheme = SchemeRate(**row)
+        await db.scheme_rates.update_one(
+            {"_id": scheme.rate_key},
+            {"$setOnInsert": scheme.model_dump()},
+            upsert=True
+        )
+
+
+async def load_rate_snapshot(db) -> RateSnapshot:
+    """Read the scheme_rates collection into a fresh snapshot"""
+    docs = await db.scheme_rates.find({}).to_list(None)
+    docs.sort(key=lambda doc: (_DEFAULT_ORDER.get(doc["_id"], len(_DEFAULT_ORDER)), str(doc["_id"])))
+    schemes = [SchemeRate(**{k: v for k, v in doc.items() if k != "_id"}) for doc in docs]
+    # Rates missing from the collection keep their built-in defaults
+    return RateSnapshot(schemes, fallback_rates=_DEFAULT_RATES)
+
+
+async def refresh_rates(db) -> bool:
+    try:
+        changed = set_snapshot(await load_rate_snapshot(db))
+        if changed:
+            logger.info(f"Loaded scheme rates version {_snapshot.version}")
+        return changed
+    except Exception as e:
+        logger.error(f"Error loading scheme rates: {str(e)}")
+        return False
+
+
+async def refresh_rates_periodically(db, interval_seconds: float) -> None:
+    """Poll the registry so rate edits reach every worker within one interval"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await refresh_rates(db)
@@ -1,31 +1,136 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Depends, Request, Response, Header
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import asynccontextmanager
+from pymongo import ReturnDocument
 import os
+import json
+import asyncio
 import logging
 from pathlib import Path
-from typing import List
+from typing import List, Literal, Optional
+from pydantic import ValidationError
 from datetime import datetime
-import uuid
 
 from models import (
     FinancialPlan, FinancialPlanCreate, ProfileData, 
     ProtectionData, WealthData, GoalsData, Goal,
-    FinancialPlanResponse
+    FinancialPlanResponse, PlanDeltaRequest
 )
 from financial_calculator import FinancialCalculator
+from batch_calculator import BatchFinancialCalculator
+from plan_cache import PlanCalculationCache, PlanDocumentCache
+from plan_timeline import iter_plan_timeline, iter_ndjson
+from plan_fields import InvalidFieldSelection, plan_list_projection
+from pagination import PLAN_LIST_SORT, PLAN_PAGE_SIZE, InvalidCursor, encode_cursor, keyset_filter
+from serialization import FastJSONResponse, dumps, ndjson_line
+from database import create_client, get_database, ping
+from db_indexes import ensure_indexes, explain_route_queries
+from plan_ingest import prepare_plan, parse_json_array, parse_ndjson_stream, insert_plans_bulk
+from plan_delta import recompute_plan_delta
+from rate_registry import (
+    current_snapshot, seed_scheme_rates, refresh_rates, refresh_rates_periodically
+)
+from http_caching import (
+    PLAN_CACHE_CONTROL, PLAN_ETAG_PROJECTION, etag_matches, if_match_filter, not_modified,
+    plan_etag, plan_list_etag
+)
+from analytics import (
+    ANALYTICS_FIELDS, ANALYTICS_PROJECTION, cohort_summary, rebuild_cohorts,
+    record_plan_deleted, record_plan_updated, record_plans_created
+)
+from plan_history import (
+    HISTORY_PAGE_SIZE, delete_history, list_history, reconstruct_version, record_update, restore_projection
+)
+from plan_patch import (
+    JSON_PATCH_TYPE, MERGE_PATCH_TYPE, PatchError, PlanUpdate,
+    json_patch_update, merge_patch_update, replace_fields_update
+)
+from metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, MongoCommandListener,
+    register_cache_metrics, render_metrics
+)
+from profiling import ProfilingMiddleware
+from compression import CompressionMiddleware
+from compute_pool import ComputeExecutor, ComputeOverloaded
+from singleflight import SingleFlight
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection, created by the lifespan so importing this module needs no
+# Mongo configuration; tests and benchmarks may bind their own db beforehand
+client: Optional[AsyncIOMotorClient] = None
+db = None
+MONGO_PING_TIMEOUT_SECONDS = float(os.environ.get('MONGO_PING_TIMEOUT_SECONDS', '2'))
+
+# Memoized plan calculations, keyed on the canonical profile and current rates
+plan_calculation_cache = PlanCalculationCache(
+    max_size=int(os.environ.get('PLAN_CACHE_SIZE', '4096')),
+    ttl_seconds=float(os.environ.get('PLAN_CACHE_TTL_SECONDS', '600'))
+)
+register_cache_metrics("plan_calculation_cache", plan_calculation_cache.stats, prefix="plan_cache")
+
+# Encoded plan documents for GET /plan/{id}; hits are checked against the stored version
+plan_document_cache = PlanDocumentCache(
+    max_size=int(os.environ.get('PLAN_DOCUMENT_CACHE_SIZE', '4096')),
+    ttl_seconds=float(os.environ.get('PLAN_DOCUMENT_CACHE_TTL_SECONDS', '300'))
+)
+register_cache_metrics("plan_document_cache", plan_document_cache.stats)
+
+# Heavy calculations (simulations, large batches) run off the event loop;
+# single plans take microseconds and stay inline
+compute_executor = ComputeExecutor(
+    kind=os.environ.get('COMPUTE_EXECUTOR', 'thread'),
+    workers=int(os.environ['COMPUTE_WORKERS']) if os.environ.get('COMPUTE_WORKERS') else None,
+    max_pending=int(os.environ.get('COMPUTE_MAX_PENDING', '64'))
+)
+BATCH_INLINE_MAX = int(os.environ.get('COMPUTE_BATCH_INLINE_MAX', '32'))
+
+# Plan history keeps a full snapshot every N versions to bound reconstruction
+PLAN_HISTORY_SNAPSHOT_EVERY = int(os.environ.get('PLAN_HISTORY_SNAPSHOT_EVERY', '20'))
+
+# Identical concurrent simulations share one run on the compute executor
+simulation_flights = SingleFlight("calculate_plan_simulation")
+
+# Scheme rate registry refresh cadence and client cache lifetime
+RATE_REFRESH_SECONDS = float(os.environ.get('RATE_REFRESH_SECONDS', '300'))
+SCHEME_RATES_MAX_AGE = int(os.environ.get('SCHEME_RATES_MAX_AGE', '300'))
 
-# Create the main app
-app = FastAPI()
+async def prepare_database(app: FastAPI, db) -> None:
+    """Indexes and scheme rates; runs in the background so startup doesn't wait on Mongo"""
+    await ensure_indexes(db)
+    try:
+        await seed_scheme_rates(db)
+    except Exception as e:
+        logger.error(f"Error seeding scheme rates: {str(e)}")
+    await refresh_rates(db)
+    if RATE_REFRESH_SECONDS > 0:
+        app.state.rate_refresh_task = asyncio.create_task(
+            refresh_rates_periodically(db, RATE_REFRESH_SECONDS)
+        )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global client, db
+    if db is None:
+        client = create_client(event_listeners=[MongoCommandListener()])
+        db = get_database(client)
+    app.state.database_task = asyncio.create_task(prepare_database(app, db))
+    try:
+        yield
+    finally:
+        for task in (app.state.database_task, getattr(app.state, "rate_refresh_task", None)):
+            if task:
+                task.cancel()
+        compute_executor.shutdown()
+        if client is not None:
+            client.close()
+
+# Create the main app; hot routes return FastJSONResponse directly to skip jsonable_encoder
+app = FastAPI(default_response_class=FastJSONResponse, lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -44,88 +149,406 @@ async def root():
     return {"message": "PRP Finance API", "version": "1.0"}
 
 @api_router.post("/calculate-plan")
-async def calculate_financial_plan(profile: ProfileData):
+async def calculate_financial_plan(
+    profile: ProfileData,
+    simulate: bool = False,
+    paths: int = Query(10000, ge=100, le=100000),
+    seed: Optional[int] = None
+):
     """Calculate comprehensive financial plan based on profile"""
     try:
         profile_dict = profile.model_dump()
-        calculations = FinancialCalculator.calculate_comprehensive_plan(profile_dict)
-        return calculations
+        calculations = plan_calculation_cache.get_or_compute(
+            profile_dict, FinancialCalculator.calculate_comprehensive_plan
+        )
+        if simulate:
+            # Copy the path down to mutual_funds; the cached plan is shared
+            mutual_funds = dict(calculations["wealth"]["mutual_funds"])
+            flight_key = (plan_calculation_cache.key_for(profile_dict), paths, seed)
+            mutual_funds["monte_carlo"] = await simulation_flights.do(
+                flight_key,
+                lambda: compute_executor.run(
+                    "simulate_sip_returns", FinancialCalculator.simulate_sip_returns,
+                    mutual_funds["monthly_sip"], 20, mutual_funds["expected_return"] / 100,
+                    paths=paths, seed=seed
+                )
+            )
+            calculations = {
+                **calculations,
+                "wealth": {**calculations["wealth"], "mutual_funds": mutual_funds}
+            }
+        return FastJSONResponse(calculations)
+    except ComputeOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Error calculating plan: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.post("/calculate-plan/delta")
+async def calculate_plan_delta(delta: PlanDeltaRequest):
+    """Recompute only the parts of a plan affected by changed profile fields"""
+    unknown = sorted(set(delta.changes) - set(ProfileData.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown profile fields: {', '.join(unknown)}")
+    previous_profile = delta.profile.model_dump()
+    try:
+        profile_dict = ProfileData(**{**previous_profile, **delta.changes}).model_dump()
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    try:
+        changed_fields = [
+            field for field in delta.changes if profile_dict[field] != previous_profile[field]
+        ]
+        plan, changed_paths = recompute_plan_delta(profile_dict, delta.previous_plan, changed_fields)
+        return FastJSONResponse({
+            "profile": profile_dict,
+            "plan": plan,
+            "changed_fields": changed_fields,
+            "changed_paths": changed_paths
+        })
+    except Exception as e:
+        logger.error(f"Error calculating plan delta: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _plan_timeline_response(profile: ProfileData, years: int, granularity: str) -> StreamingResponse:
+    profile_dict = profile.model_dump()
+    plan = plan_calculation_cache.get_or_compute(
+        profile_dict, FinancialCalculator.calculate_comprehensive_plan
+    )
+    rows = iter_plan_timeline(profile_dict, plan, years=years, granularity=granularity)
+    return StreamingResponse(iter_ndjson(rows), media_type="application/x-ndjson")
+
+@api_router.post("/calculate-plan/timeline")
+async def stream_plan_timeline(
+    profile: ProfileData,
+    years: int = Query(20, ge=1, le=100),
+    granularity: Literal["year", "month"] = "year"
+):
+    """Stream the year-by-year (or monthly) corpus per bucket as NDJSON"""
+    try:
+        return _plan_timeline_response(profile, years, granularity)
+    except Exception as e:
+        logger.error(f"Error building plan timeline: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/calculate-plan/timeline")
+async def get_plan_timeline(
+    profile: ProfileData = Depends(),
+    years: int = Query(20, ge=1, le=100),
+    granularity: Literal["year", "month"] = "year"
+):
+    """Stream the plan timeline for a profile passed as query parameters"""
+    try:
+        return _plan_timeline_response(profile, years, granularity)
+    except Exception as e:
+        logger.error(f"Error building plan timeline: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/calculate-plan/cache-stats")
+async def get_plan_cache_stats():
+    """Get hit/miss/eviction counters for the plan calculation cache"""
+    return plan_calculation_cache.stats()
+
+@api_router.post("/calculate-plans/batch")
+async def calculate_financial_plans_batch(profiles: List[ProfileData]):
+    """Calculate comprehensive financial plans for many profiles in one pass"""
+    try:
+        profile_dicts = [profile.model_dump() for profile in profiles]
+        if len(profile_dicts) <= BATCH_INLINE_MAX:
+            return FastJSONResponse(BatchFinancialCalculator.calculate_comprehensive_plans(profile_dicts))
+        body = await compute_executor.run_json(
+            "batch_plans", BatchFinancialCalculator.calculate_comprehensive_plans, profile_dicts
+        )
+        return Response(content=body, media_type="application/json")
+    except ComputeOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        logger.error(f"Error calculating batch plans: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _record_analytics(update) -> None:
+    """Cohort rollups must never fail the plan write; a rebuild repairs any drift"""
+    try:
+        await update
+    except Exception as e:
+        logger.error(f"Error updating cohort analytics: {str(e)}")
+
 @api_router.post("/plans", response_model=dict)
 async def create_plan(plan_data: dict):
     """Create and save a financial plan"""
     try:
-        plan_data["_id"] = str(uuid.uuid4())
-        plan_data["created_at"] = datetime.utcnow()
-        plan_data["updated_at"] = datetime.utcnow()
-        
-        result = await db.financial_plans.insert_one(plan_data)
-        
-        if result.inserted_id:
-            created_plan = await db.financial_plans.find_one({"_id": plan_data["_id"]})
-            return {"id": created_plan["_id"], "message": "Plan saved successfully"}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to save plan")
+        plan_data = prepare_plan(plan_data)
+        await db.financial_plans.insert_one(plan_data)
+        await _record_analytics(record_plans_created(db, [plan_data]))
+        return {"id": plan_data["_id"], "message": "Plan saved successfully"}
     except Exception as e:
         logger.error(f"Error creating plan: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.post("/plans/bulk")
+async def create_plans_bulk(request: Request):
+    """Save many plans from a JSON array or an NDJSON stream, reporting each item"""
+    try:
+        content_type = request.headers.get("content-type", "")
+        if "ndjson" in content_type or "jsonl" in content_type:
+            items = parse_ndjson_stream(request.stream())
+        else:
+            try:
+                items = parse_json_array(await request.body())
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        report = await insert_plans_bulk(
+            db.financial_plans, items,
+            on_inserted=lambda plans: _record_analytics(record_plans_created(db, plans))
+        )
+        return FastJSONResponse(report.to_dict())
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk creating plans: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _plan_page_headers(
+    plans: List[dict], user_id: str, limit: int, cursor: Optional[str], selection: str, request: Request
+) -> dict:
+    """Cache and pagination headers for a page fetched with limit + 1 documents"""
+    headers = {
+        "ETag": plan_list_etag(plans, user_id, str(limit), cursor or "", selection),
+        "Cache-Control": PLAN_CACHE_CONTROL
+    }
+    if len(plans) > limit:
+        next_cursor = encode_cursor(plans[limit - 1])
+        next_url = request.url.include_query_params(cursor=next_cursor, limit=limit)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    return headers
+
 @api_router.get("/plans/{user_id}")
-async def get_user_plans(user_id: str):
-    """Get all plans for a user"""
+async def get_user_plans(
+    user_id: str,
+    request: Request,
+    limit: int = Query(PLAN_PAGE_SIZE, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: Optional[str] = None
+):
+    """Get a page of plans for a user, newest first.
+
+    fields (comma-separated dotted paths) and view=summary limit what is read
+    from Mongo and returned; _id, created_at, updated_at and version always are.
+    When more plans exist, the next page's cursor is returned in the
+    X-Next-Cursor and Link headers. The ETag covers the page's plans, their
+    versions and the field selection; a matching If-None-Match gets a 304
+    after an index-only lookup.
+    """
     try:
-        plans = await db.financial_plans.find({"user_id": user_id}).to_list(100)
-        return plans
+        query = keyset_filter({"user_id": user_id}, cursor)
+        projection, selection = plan_list_projection(fields, view)
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            revisions = await db.financial_plans.find(
+                query, {**PLAN_ETAG_PROJECTION, "created_at": 1}
+            ).sort(PLAN_LIST_SORT).limit(limit + 1).to_list(limit + 1)
+            headers = _plan_page_headers(revisions, user_id, limit, cursor, selection, request)
+            if etag_matches(if_none_match, headers["ETag"]):
+                return not_modified(headers)
+        plans = await db.financial_plans.find(
+            query, projection
+        ).sort(PLAN_LIST_SORT).limit(limit + 1).to_list(limit + 1)
+        headers = _plan_page_headers(plans, user_id, limit, cursor, selection, request)
+        return FastJSONResponse(plans[:limit], headers=headers)
+    except (InvalidCursor, InvalidFieldSelection) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching plans: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.get("/plans/{user_id}/stream")
+async def stream_user_plans(
+    user_id: str,
+    cursor: Optional[str] = None,
+    batch_size: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = None,
+    view: Optional[str] = None
+):
+    """Stream every plan for a user as NDJSON, newest first, optionally limited to fields/view"""
+    try:
+        query = keyset_filter({"user_id": user_id}, cursor)
+        projection, _ = plan_list_projection(fields, view)
+    except (InvalidCursor, InvalidFieldSelection) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def plan_lines():
+        plans = db.financial_plans.find(query, projection).sort(PLAN_LIST_SORT).batch_size(batch_size)
+        try:
+            async for plan in plans:
+                yield ndjson_line(plan)
+        except Exception as e:
+            logger.error(f"Error streaming plans: {str(e)}")
+            raise
+        finally:
+            await plans.close()
+
+    return StreamingResponse(plan_lines(), media_type="application/x-ndjson")
+
 @api_router.get("/plan/{plan_id}")
-async def get_plan(plan_id: str):
-    """Get a specific plan by ID"""
+async def get_plan(plan_id: str, request: Request):
+    """Get a specific plan by ID, from the document cache when its version is unchanged"""
     try:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match or plan_document_cache.holds(plan_id):
+            # Only the version: enough for a 304 or to validate a cached copy
+            revision = await db.financial_plans.find_one({"_id": plan_id}, PLAN_ETAG_PROJECTION)
+            if not revision:
+                plan_document_cache.invalidate(plan_id)
+                raise HTTPException(status_code=404, detail="Plan not found")
+            etag = plan_etag(revision)
+            headers = {"ETag": etag, "Cache-Control": PLAN_CACHE_CONTROL}
+            if etag_matches(if_none_match, etag):
+                return not_modified(headers)
+            body = plan_document_cache.get(plan_id, etag)
+            if body is not None:
+                return Response(content=body, media_type="application/json", headers=headers)
         plan = await db.financial_plans.find_one({"_id": plan_id})
         if not plan:
             raise HTTPException(status_code=404, detail="Plan not found")
-        return plan
+        etag = plan_etag(plan)
+        body = dumps(plan)
+        plan_document_cache.set(plan_id, etag, body)
+        return Response(
+            content=body, media_type="application/json", headers={"ETag": etag, "Cache-Control": PLAN_CACHE_CONTROL}
+        )
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error fetching plan: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_router.put("/plan/{plan_id}")
-async def update_plan(plan_id: str, plan_data: dict):
-    """Update an existing plan"""
+async def _update_plan(plan_id: str, request: Request, update: PlanUpdate) -> Response:
+    """Apply the update in one find_one_and_update, guarded by If-Match and any test conditions"""
+    query = {"_id": plan_id, **update.conditions}
+    if_match = request.headers.get("if-match")
+    if if_match is not None:
+        precondition = if_match_filter(if_match)
+        if precondition is None:
+            raise HTTPException(status_code=412, detail="Plan has been modified")
+        query = {**query, **precondition}
     try:
-        plan_data["updated_at"] = datetime.utcnow()
-        result = await db.financial_plans.update_one(
-            {"_id": plan_id},
-            {"$set": plan_data}
-        )
-        
-        if result.modified_count == 0:
+        mongo_update = update.to_mongo(datetime.utcnow())
+    except PatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # BEFORE, projected to the touched paths and cohort fields: the old values
+    # plan history and analytics need
+    before = await db.financial_plans.find_one_and_update(
+        query, mongo_update, projection=restore_projection(mongo_update, ANALYTICS_FIELDS),
+        return_document=ReturnDocument.BEFORE
+    )
+    plan_document_cache.invalidate(plan_id)
+    if before is None:
+        # Only on failure: tell a missing plan apart from a failed precondition
+        if not await db.financial_plans.find_one({"_id": plan_id}, {"_id": 1}):
             raise HTTPException(status_code=404, detail="Plan not found")
-        
-        return {"message": "Plan updated successfully"}
+        if update.conditions and if_match is None:
+            raise HTTPException(status_code=409, detail="JSON Patch test failed")
+        raise HTTPException(status_code=412, detail="Plan has been modified")
+    version = (before.get("version") or 0) + 1
+    try:
+        await record_update(db, plan_id, before, mongo_update, PLAN_HISTORY_SNAPSHOT_EVERY)
+    except Exception as e:
+        logger.error(f"Error recording plan history: {str(e)}")
+    await _record_analytics(record_plan_updated(db, before, mongo_update))
+    return FastJSONResponse(
+        {"message": "Plan updated successfully", "version": version},
+        headers={"ETag": plan_etag({"version": version})}
+    )
+
+async def _read_plan_update(request: Request, default_type: str) -> PlanUpdate:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    try:
+        body = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be JSON")
+    try:
+        if content_type == JSON_PATCH_TYPE:
+            return json_patch_update(body)
+        if content_type == MERGE_PATCH_TYPE or default_type == MERGE_PATCH_TYPE:
+            return merge_patch_update(body)
+        if not isinstance(body, dict):
+            raise PatchError("Plan must be a JSON object")
+        return replace_fields_update(body)
+    except PatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.put("/plan/{plan_id}")
+async def update_plan(plan_id: str, request: Request):
+    """Update an existing plan.
+
+    A plain JSON body replaces the top-level fields it contains;
+    application/merge-patch+json and application/json-patch+json bodies are
+    applied as patches. Send If-Match with the plan's ETag to reject the update
+    if someone else changed the plan first.
+    """
+    try:
+        update = await _read_plan_update(request, "application/json")
+        return await _update_plan(plan_id, request, update)
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error updating plan: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.patch("/plan/{plan_id}")
+async def patch_plan(plan_id: str, request: Request):
+    """Partially update a plan with a JSON merge patch (the default) or a JSON Patch"""
+    try:
+        update = await _read_plan_update(request, MERGE_PATCH_TYPE)
+        return await _update_plan(plan_id, request, update)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error patching plan: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/plan/{plan_id}/history")
+async def get_plan_history(
+    plan_id: str,
+    version: Optional[int] = Query(None, ge=0),
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=1000)
+):
+    """List a plan's earlier versions, or rebuild the plan as it was at ?version="""
+    try:
+        if version is not None:
+            plan = await reconstruct_version(db, plan_id, version)
+            if plan is None:
+                raise HTTPException(status_code=404, detail="Plan version not found")
+            return FastJSONResponse(plan, headers={"ETag": plan_etag(plan)})
+        current = await db.financial_plans.find_one({"_id": plan_id}, PLAN_ETAG_PROJECTION)
+        if not current:
+            raise HTTPException(status_code=404, detail="Plan not found")
+        return FastJSONResponse({
+            "plan_id": plan_id,
+            "current_version": current.get("version") or 0,
+            "versions": await list_history(db, plan_id, limit)
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching plan history: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @api_router.delete("/plan/{plan_id}")
 async def delete_plan(plan_id: str):
     """Delete a plan"""
     try:
-        result = await db.financial_plans.delete_one({"_id": plan_id})
+        deleted = await db.financial_plans.find_one_and_delete({"_id": plan_id}, projection=ANALYTICS_PROJECTION)
+        plan_document_cache.invalidate(plan_id)
         
-        if result.deleted_count == 0:
+        if deleted is None:
             raise HTTPException(status_code=404, detail="Plan not found")
         
+        await delete_history(db, plan_id)
+        await _record_analytics(record_plan_deleted(db, deleted))
         return {"message": "Plan deleted successfully"}
     except HTTPException:
         raise
@@ -144,7 +567,7 @@ async def calculate_goal(goal_data: dict):
             raise HTTPException(status_code=400, detail="amount_today and years required")
         
         result = FinancialCalculator.calculate_goal_requirement(amount, years)
-        return result
+        return FastJSONResponse(result)
     except HTTPException:
         raise
     except Exception as e:
@@ -152,33 +575,84 @@ async def calculate_goal(goal_data: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/scheme-rates")
-async def get_scheme_rates():
+async def get_scheme_rates(request: Request):
     """Get current government scheme interest rates"""
-    return {
-        "schemes": [
-            {
-                "name": "Sukanya Samriddhi Yojana",
-                "rate": 8.0,
-                "description": "For girl child under 10 years",
-                "tenure": "21 years",
-                "tax_benefit": "Section 80C up to ₹1.5 lakh"
-            },
-            {
-                "name": "Public Provident Fund (PPF)",
-                "rate": 7.1,
-                "description": "Long-term savings with tax benefits",
-                "tenure": "15 years (extendable)",
-                "tax_benefit": "Section 80C up to ₹1.5 lakh"
-            },
-            {
-                "name": "National Pension System (NPS)",
-                "rate": 10.0,
-                "description": "Market-linked retirement savings",
-                "tenure": "Till age 60",
-                "tax_benefit": "Section 80C + 80CCD(1B) up to ₹2 lakh"
-            }
-        ]
+    snapshot = current_snapshot()
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": f"public, max-age={SCHEME_RATES_MAX_AGE}"
     }
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(snapshot.listing, headers=headers)
+
+def _require_admin(x_admin_token: Optional[str]) -> None:
+    """Admin routes exist only when ADMIN_TOKEN is set, and need it in X-Admin-Token"""
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token != admin_token:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@api_router.get("/admin/query-plans")
+async def get_query_plans(
+    user_id: str = "explain-user",
+    plan_id: str = "explain-plan",
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Get explain() output for each route's Mongo query to spot collection scans"""
+    _require_admin(x_admin_token)
+    try:
+        return await explain_route_queries(db, user_id=user_id, plan_id=plan_id)
+    except Exception as e:
+        logger.error(f"Error explaining queries: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.get("/analytics/cohorts")
+async def get_cohort_analytics(by: Literal["cohort", "age", "income"] = "cohort"):
+    """Plan counts, average surplus/savings and unaffordable share per age and/or income band"""
+    try:
+        return FastJSONResponse(await cohort_summary(db, by))
+    except Exception as e:
+        logger.error(f"Error fetching cohort analytics: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_router.post("/analytics/cohorts/rebuild")
+async def rebuild_cohort_analytics(x_admin_token: Optional[str] = Header(None)):
+    """Recompute the cohort rollups from every stored plan.
+
+    Admin only: it scans every plan, and plan writes made while it runs can be
+    lost from the rollups until the next rebuild, so run it while writes are quiet.
+    """
+    _require_admin(x_admin_token)
+    try:
+        return {"cohorts": await rebuild_cohorts(db), "message": "Cohort analytics rebuilt"}
+    except Exception as e:
+        logger.error(f"Error rebuilding cohort analytics: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the worker is up and serving; doesn't touch Mongo"""
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """Readiness: startup database work has finished and Mongo answers a ping"""
+    database_task = getattr(app.state, "database_task", None)
+    if database_task is not None and not database_task.done():
+        return FastJSONResponse({"status": "starting"}, status_code=503)
+    try:
+        await ping(db, MONGO_PING_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.error(f"Readiness check failed: {str(e)}")
+        return FastJSONResponse({"status": "unavailable"}, status_code=503)
+    return {"status": "ready"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -189,8 +663,20 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination and revalidation headers browser clients need to read
+    expose_headers=["ETag", "X-Next-Cursor", "Link"],
 )
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+)
+# Opt-in request profiling; not registered at all unless enabled
+if os.environ.get('PROFILING_ENABLED', '').lower() in ('1', 'true', 'yes'):
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=os.environ.get('PROFILE_DIR', str(ROOT_DIR / 'profiles')),
+        sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', '0')),
+        token=os.environ.get('PROFILE_TOKEN') or None
+    )
+# Added last so it wraps everything, including CORS preflights and error responses
+app.add_middleware(MetricsMiddleware)
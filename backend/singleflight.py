@@ -0,0 +1,44 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from metrics import REGISTRY, Counter
+
+SINGLEFLIGHT_CALLS = REGISTRY.register(Counter(
+    "singleflight_calls_total", "Calls through a single-flight group, by whether they led or joined a flight",
+    ("group", "role")
+))
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key onto one in-flight coroutine.
+
+    Unlike a cache, nothing is kept once the flight lands: the next call with
+    the same key starts a new one. The work runs as its own task, so a caller
+    disconnecting doesn't cancel it for the others. Results are shared, so
+    callers must not mutate them.
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._flights.get(key)
+        if task is None:
+            SINGLEFLIGHT_CALLS.inc(self.group, "leader")
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._land(key, done))
+        else:
+            SINGLEFLIGHT_CALLS.inc(self.group, "coalesced")
+        return await asyncio.shield(task)
+
+    def _land(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller went away
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._flights)
@@ -47,13 +47,25 @@ export const apiService = {
 
   async getUserPlans(userId: string) {
     try {
-      const response = await fetch(`${BACKEND_URL}/api/plans/${userId}`);
-
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-
-      return await response.json();
+      // The API returns one page at a time; follow X-Next-Cursor until the last page
+      const plans: any[] = [];
+      let cursor: string | null = null;
+      do {
+        const params = new URLSearchParams({ limit: '100' });
+        if (cursor) {
+          params.set('cursor', cursor);
+        }
+        const response = await fetch(`${BACKEND_URL}/api/plans/${userId}?${params.toString()}`);
+
+        if (!response.ok) {
+          throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        plans.push(...(await response.json()));
+        cursor = response.headers.get('X-Next-Cursor');
+      } while (cursor);
+
+      return plans;
     } catch (error) {
       console.error('Error fetching plans:', error);
       throw error;
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# The backend modules use flat imports relative to backend/
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from analytics import ROLLUP_SUMS, cohort_summary, plan_is_affordable, plan_surplus, rebuild_pipeline
+from benchmarks.bench_api import SAMPLE_PROFILE, in_process_client, plan_document
+from benchmarks.memory_db import InMemoryDatabase
+from financial_calculator import FinancialCalculator
+
+
+def _saved_plan(**profile):
+    """A plan as the app saves it: no surplus or affordability"""
+    document = plan_document("u1", {**SAMPLE_PROFILE, **profile})
+    return {key: document[key] for key in ("user_id", "profile", "protection", "wealth", "goals", "total_monthly_savings")}
+
+
+@pytest.mark.parametrize("income", [30000, 60000, 100000, 300000])
+def test_derived_figures_match_the_calculator(income):
+    profile = {**SAMPLE_PROFILE, "monthly_income": income}
+    calculated = FinancialCalculator.calculate_comprehensive_plan(profile)
+    plan = _saved_plan(monthly_income=income)
+    assert plan_surplus(plan) == pytest.approx(calculated["surplus"], abs=0.01)
+    assert plan_is_affordable(plan) is calculated["affordability"]["is_affordable"]
+
+
+def test_stored_figures_win_and_missing_inputs_are_unknown():
+    assert plan_surplus({"surplus": 5, "profile": {}}) == 5
+    assert plan_is_affordable({"affordability": {"is_affordable": False}}) is False
+    assert plan_surplus({"profile": {"monthly_income": 1, "monthly_expenses": 1}}) is None
+    assert plan_is_affordable({"profile": {"monthly_income": 1}}) is None
+
+
+def _rollups(documents):
+    return {
+        rollup["_id"]: {name: pytest.approx(rollup.get(name, 0)) for name in ROLLUP_SUMS}
+        for rollup in documents if rollup.get("plans")
+    }
+
+
+def test_incremental_rollups_match_a_rebuild():
+    mongomock = pytest.importorskip("mongomock")
+    db = InMemoryDatabase()
+
+    async def write_plans():
+        async with in_process_client(db) as client:
+            ids = []
+            for income in (30000, 60000, 60000, 100000, 150000, 300000):
+                response = await client.post("/api/plans", json=_saved_plan(monthly_income=income))
+                ids.append(response.json()["id"])
+            # A plan saved with the full calculator output, and one without a usable profile
+            full = FinancialCalculator.calculate_comprehensive_plan(SAMPLE_PROFILE)
+            await client.post("/api/plans", json={"user_id": "u1", "profile": SAMPLE_PROFILE, **full})
+            await client.post("/api/plans", json={"user_id": "u1", "profile": {"age": 30}})
+
+            patches = [
+                (ids[0], {"profile": {"monthly_income": 250000}}),
+                (ids[1], {"wealth": {"child_plans": None}}),
+                (ids[2], {"profile": {"monthly_expenses": 10000}, "total_monthly_savings": 20000}),
+                (ids[3], {"protection": None}),
+            ]
+            for plan_id, patch in patches:
+                assert (await client.patch(f"/api/plan/{plan_id}", json=patch)).status_code == 200
+            assert (await client.delete(f"/api/plan/{ids[4]}")).status_code == 200
+        return await db.plan_cohorts.find({}).to_list(None), await db.financial_plans.find({}).to_list(None)
+
+    incremental, plans = asyncio.run(write_plans())
+    rebuilt = mongomock.MongoClient().db
+    rebuilt.financial_plans.insert_many(plans)
+    list(rebuilt.financial_plans.aggregate(rebuild_pipeline()))
+
+    assert _rollups(incremental) == _rollups(rebuilt.plan_cohorts.find())
+    summary = asyncio.run(cohort_summary(db))
+    assert summary["total_plans"] == 6
+    assert all(cohort["avg_surplus"] is not None for cohort in summary["cohorts"])
+
+
+def test_rebuild_route_needs_the_admin_token(monkeypatch):
+    async def post(headers):
+        async with in_process_client(InMemoryDatabase()) as client:
+            return (await client.post("/api/analytics/cohorts/rebuild", headers=headers)).status_code
+
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert asyncio.run(post({})) == 404
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    assert asyncio.run(post({"X-Admin-Token": "wrong"})) == 403
@@ -0,0 +1,53 @@
+import itertools
+
+import pytest
+
+from batch_calculator import BatchFinancialCalculator
+from benchmarks.loadgen import ProfileGenerator
+from financial_calculator import FinancialCalculator
+from models import ProfileData
+
+
+def _profiles():
+    generator = ProfileGenerator(seed=1)
+    raw = [generator.profile() for _ in range(200)]
+    # Retired, negative-surplus and float-income cases, with and without children
+    raw += [
+        {
+            "age": age, "monthly_income": income, "monthly_expenses": expenses, "family_size": family_size,
+            "has_dependents": True, "risk_comfort": risk, "has_daughter": True, "daughter_age": daughter_age,
+            "has_son": True, "son_age": 3,
+        }
+        for age, income, expenses, family_size, risk, daughter_age in itertools.product(
+            (25, 60, 65), (10000, 55555.5, 400000), (5000, 9000.5, 60000), (1, 4), ("Low", "High"), (0, 12)
+        )
+    ]
+    # Raw dicts keep int amounts; the API's validated profiles carry floats
+    return raw + [ProfileData(**profile).model_dump() for profile in raw]
+
+
+def _assert_same(scalar, batch, path="plan"):
+    assert type(batch) is type(scalar), f"{path}: {type(scalar).__name__} vs {type(batch).__name__}"
+    if isinstance(scalar, dict):
+        assert batch.keys() == scalar.keys(), path
+        for key in scalar:
+            _assert_same(scalar[key], batch[key], f"{path}.{key}")
+    elif isinstance(scalar, list):
+        assert len(batch) == len(scalar), path
+        for index, (s, b) in enumerate(zip(scalar, batch)):
+            _assert_same(s, b, f"{path}[{index}]")
+    elif isinstance(scalar, float):
+        assert batch == pytest.approx(scalar, rel=1e-9, abs=1e-6), path
+    else:
+        assert batch == scalar, path
+
+
+def test_batch_matches_scalar_values_and_types():
+    profiles = _profiles()
+    plans = BatchFinancialCalculator.calculate_comprehensive_plans(profiles)
+    for profile, plan in zip(profiles, plans):
+        _assert_same(FinancialCalculator.calculate_comprehensive_plan(profile), plan)
+
+
+def test_empty_batch():
+    assert BatchFinancialCalculator.calculate_comprehensive_plans([]) == []
@@ -0,0 +1,15 @@
+import asyncio
+
+from benchmarks.loadgen import run_load
+
+
+def _worst_p99(clients):
+    report = asyncio.run(run_load(
+        clients=clients, duration=30, max_requests=120, users=5, plans_per_user=5, db_latency_ms=1
+    ))
+    assert report["total_errors"] == 0
+    return max(route["p99_ms"] for route in report["routes"].values() if route["count"])
+
+
+def test_latency_grows_with_concurrent_clients():
+    assert _worst_p99(16) > 2 * _worst_p99(1)
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.memory_db import InMemoryDatabase
+from pagination import PLAN_LIST_SORT, InvalidCursor, decode_cursor, encode_cursor, keyset_filter
+
+START = datetime(2024, 1, 1, 12, 30, 15, 123000)
+
+
+def _plans():
+    # Pairs of plans share a timestamp, so _id has to break the ties
+    return [
+        {"_id": f"plan-{i:02d}", "user_id": "u1", "created_at": START + timedelta(minutes=i // 2)}
+        for i in range(11)
+    ]
+
+
+def test_cursor_round_trip():
+    doc = {"_id": "plan-1", "created_at": START}
+    token = encode_cursor(doc)
+    assert "=" not in token
+    assert decode_cursor(token) == {"created_at": START, "_id": "plan-1"}
+
+
+@pytest.mark.parametrize("token", ["", "not-base64!", "e30", encode_cursor({"_id": 1, "created_at": START})[:-3]])
+def test_invalid_cursor(token):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token)
+
+
+def test_keyset_filter_without_cursor_is_the_base_query():
+    assert keyset_filter({"user_id": "u1"}, None) == {"user_id": "u1"}
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 3, 11, 20])
+def test_pages_cover_every_plan_once_in_order(page_size):
+    db = InMemoryDatabase()
+
+    async def walk():
+        await db.financial_plans.insert_many(_plans())
+        await db.financial_plans.insert_one({"_id": "other", "user_id": "u2", "created_at": START})
+        seen, cursor = [], None
+        while True:
+            page = await db.financial_plans.find(
+                keyset_filter({"user_id": "u1"}, cursor)
+            ).sort(PLAN_LIST_SORT).limit(page_size + 1).to_list(page_size + 1)
+            seen.extend(doc["_id"] for doc in page[:page_size])
+            if len(page) <= page_size:
+                return seen
+            cursor = encode_cursor(page[page_size - 1])
+
+    expected = [doc["_id"] for doc in sorted(_plans(), key=lambda d: (d["created_at"], d["_id"]), reverse=True)]
+    assert asyncio.run(walk()) == expected
+
+
+def test_plan_list_route_follows_next_cursor():
+    from benchmarks.bench_api import in_process_client
+
+    db = InMemoryDatabase()
+
+    async def walk():
+        await db.financial_plans.insert_many(_plans())
+        seen, params = [], {"limit": 4}
+        async with in_process_client(db) as client:
+            while True:
+                response = await client.get("/api/plans/u1", params=params, headers={"Origin": "http://app"})
+                assert response.status_code == 200
+                assert "X-Next-Cursor" in response.headers["access-control-expose-headers"]
+                seen.extend(plan["_id"] for plan in response.json())
+                cursor = response.headers.get("X-Next-Cursor")
+                if cursor is None:
+                    assert "Link" not in response.headers
+                    return seen
+                assert 'rel="next"' in response.headers["Link"]
+                params = {"limit": 4, "cursor": cursor}
+
+    assert len(asyncio.run(walk())) == 11
+
+
+def test_plan_list_route_rejects_bad_cursor():
+    from benchmarks.bench_api import in_process_client
+
+    async def get():
+        async with in_process_client(InMemoryDatabase()) as client:
+            return await client.get("/api/plans/u1", params={"cursor": "bogus"})
+
+    assert asyncio.run(get()).status_code == 400
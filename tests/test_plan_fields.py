@@ -0,0 +1,29 @@
+import pytest
+
+from benchmarks.bench_api import SAMPLE_PROFILE, plan_document
+from plan_fields import PLAN_VIEWS, InvalidFieldSelection, plan_list_projection
+from plan_patch import MISSING, get_path
+
+
+@pytest.mark.parametrize("view", PLAN_VIEWS)
+def test_view_fields_exist_in_saved_plans(view):
+    plan = plan_document("u1", SAMPLE_PROFILE)
+    assert [path for path in PLAN_VIEWS[view] if get_path(plan, path) is MISSING] == []
+
+
+def test_projection_keeps_required_fields_and_drops_nested_paths():
+    projection, canonical = plan_list_projection("profile, profile.age,wealth.gold", None)
+    assert projection == {
+        "_id": 1, "created_at": 1, "profile": 1, "updated_at": 1, "version": 1, "wealth.gold": 1,
+    }
+    assert canonical == "_id,created_at,profile,updated_at,version,wealth.gold"
+
+
+def test_no_selection_means_whole_documents():
+    assert plan_list_projection(None, None) == (None, "")
+
+
+@pytest.mark.parametrize("fields,view", [("$where", None), ("a..b", None), (None, "full")])
+def test_invalid_selection(fields, view):
+    with pytest.raises(InvalidFieldSelection):
+        plan_list_projection(fields, view)
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime
+
+from benchmarks.memory_db import InMemoryDatabase
+from plan_history import list_history, reconstruct_version, record_update, restore_projection, reverse_update
+from plan_patch import merge_patch_update, replace_fields_update
+
+START = datetime(2024, 1, 1)
+
+
+async def _update(db, plan_id, patch, snapshot_every, now):
+    """Apply a merge patch and record its history the way the PATCH route does"""
+    mongo_update = merge_patch_update(patch).to_mongo(now)
+    before = await db.financial_plans.find_one_and_update(
+        {"_id": plan_id}, mongo_update, projection=restore_projection(mongo_update)
+    )
+    await record_update(db, plan_id, before, mongo_update, snapshot_every)
+
+
+def _history(snapshot_every):
+    """A plan at version 6 plus every version it passed through"""
+    db = InMemoryDatabase()
+    patches = [
+        {"profile": {"age": 31}},
+        {"profile": {"monthly_income": 120000}, "note": "raise"},
+        {"note": None},
+        {"goals": {"goals": ["house"]}},
+        {"profile": {"age": 32}, "goals": {"goals": None}},
+        {"wealth": {"gold": {"percentage": 10}}},
+    ]
+
+    async def build():
+        await db.financial_plans.insert_one({
+            "_id": "p1", "version": 0, "created_at": START, "updated_at": START,
+            "profile": {"age": 30, "monthly_income": 100000}, "wealth": {"gold": {"percentage": 7.5}},
+        })
+        versions = [await db.financial_plans.find_one({"_id": "p1"})]
+        for index, patch in enumerate(patches, 1):
+            await _update(db, "p1", patch, snapshot_every, datetime(2024, 1, 1 + index))
+            versions.append(await db.financial_plans.find_one({"_id": "p1"}))
+        return versions
+
+    return db, asyncio.run(build())
+
+
+def test_reverse_update_restores_touched_paths():
+    mongo_update = merge_patch_update({"profile": {"age": 31, "son_age": None}, "note": "x"}).to_mongo(START)
+    before = {"profile": {"age": 30, "son_age": 5}, "version": 2, "updated_at": START}
+    assert reverse_update(before, mongo_update) == {
+        "$set": {"profile.age": 30, "profile.son_age": 5, "updated_at": START, "version": 2},
+        "$unset": {"note": ""},
+    }
+
+
+def test_reverse_update_removes_parents_the_update_created():
+    mongo_update = merge_patch_update({"goals": {"goals": ["house"], "target": 1}}).to_mongo(START)
+    before = {"version": 2, "updated_at": START}
+    assert reverse_update(before, mongo_update)["$unset"] == {"goals": ""}
+    assert reverse_update({**before, "goals": {}}, mongo_update)["$unset"] == {"goals.goals": "", "goals.target": ""}
+
+
+def test_restore_projection_drops_paths_under_any_projected_parent():
+    mongo_update = replace_fields_update({"profile": {}, "profile-x": 1}).to_mongo(START)
+    projection = restore_projection(mongo_update, ["profile.age", "wealth.gold"])
+    assert projection == {
+        "profile": 1, "profile-x": 1, "wealth.gold": 1, "_id": 1, "version": 1, "updated_at": 1,
+    }
+
+
+def test_reconstruct_every_version_from_deltas():
+    db, versions = _history(snapshot_every=0)
+    for expected in versions:
+        assert asyncio.run(reconstruct_version(db, "p1", expected["version"])) == expected
+
+
+def test_reconstruct_every_version_with_snapshots():
+    db, versions = _history(snapshot_every=2)
+    snapshots = asyncio.run(db.plan_history.count_documents({"kind": "snapshot"}))
+    assert snapshots == 3
+    for expected in versions:
+        assert asyncio.run(reconstruct_version(db, "p1", expected["version"])) == expected
+
+
+def test_reconstruct_unknown_versions():
+    db, _ = _history(snapshot_every=0)
+    assert asyncio.run(reconstruct_version(db, "p1", 7)) is None
+    assert asyncio.run(reconstruct_version(db, "p1", -1)) is None
+    assert asyncio.run(reconstruct_version(db, "missing", 0)) is None
+
+
+def test_reconstruct_needs_an_unbroken_delta_chain():
+    db, _ = _history(snapshot_every=0)
+    asyncio.run(db.plan_history.delete_one({"_id": "p1:delta:1"}))
+    assert asyncio.run(reconstruct_version(db, "p1", 0)) is None
+    assert asyncio.run(reconstruct_version(db, "p1", 2)) is not None
+
+
+def test_list_history_is_newest_first():
+    db, _ = _history(snapshot_every=2)
+    entries = asyncio.run(list_history(db, "p1"))
+    assert [entry["version"] for entry in entries] == [5, 4, 3, 2, 1, 0]
+    assert entries[-1]["changed"] == ["profile.age"]
@@ -0,0 +1,150 @@
+import asyncio
+import copy
+from datetime import datetime
+
+import pytest
+
+from benchmarks.memory_db import InMemoryDatabase
+from plan_patch import (
+    PatchError, apply_update, json_patch_update, merge_patch_update, replace_fields_update
+)
+
+NOW = datetime(2024, 1, 1)
+
+STORED = {
+    "_id": "p1",
+    "version": 3,
+    "profile": {"age": 30, "monthly_income": 100000},
+    "wealth": {"gold": {"percentage": 7.5}, "child_plans": [{"scheme_name": "PPF"}]},
+    "tags": ["a", "b"],
+    "note": None,
+    "code": "$x",
+    "rate": 2.0,
+}
+
+
+def matching(conditions):
+    """Whether STORED satisfies the conditions, evaluated by the in-memory stand-in"""
+    db = InMemoryDatabase()
+
+    async def count():
+        await db.financial_plans.insert_one(STORED)
+        return await db.financial_plans.count_documents({"_id": "p1", **conditions})
+
+    return asyncio.run(count()) == 1
+
+
+def test_replace_fields_skips_server_fields():
+    update = replace_fields_update({"_id": "x", "version": 9, "profile": {"age": 31}})
+    assert update.to_mongo(NOW) == {"$set": {"profile": {"age": 31}, "updated_at": NOW}, "$inc": {"version": 1}}
+
+
+def test_merge_patch_sets_leaves_and_unsets_nulls():
+    update = merge_patch_update({"profile": {"age": 31, "son_age": None}, "note": "hi"})
+    mongo = update.to_mongo(NOW)
+    assert mongo["$set"] == {"profile.age": 31, "note": "hi", "updated_at": NOW}
+    assert mongo["$unset"] == {"profile.son_age": ""}
+    assert mongo["$inc"] == {"version": 1}
+
+
+def test_merge_patch_empty_object_is_a_no_op():
+    update = merge_patch_update({"wealth": {}, "profile": {"extra": {}}})
+    assert update.to_mongo(NOW)["$set"] == {"updated_at": NOW}
+    assert "$unset" not in update.to_mongo(NOW)
+
+
+@pytest.mark.parametrize("patch", [{"_id": "x"}, {"version": 2}, {"created_at": None}, {"$where": 1}, {"a": {"$b": 1}}])
+def test_merge_patch_rejects_server_and_operator_fields(patch):
+    with pytest.raises(PatchError):
+        merge_patch_update(patch)
+
+
+def test_merge_patch_requires_an_object():
+    with pytest.raises(PatchError):
+        merge_patch_update([1, 2])
+
+
+def test_json_patch_translation():
+    update = json_patch_update([
+        {"op": "replace", "path": "/profile/age", "value": 31},
+        {"op": "add", "path": "/wealth/child_plans/0", "value": {"scheme_name": "Sukanya"}},
+        {"op": "add", "path": "/tags/-", "value": "c"},
+        {"op": "remove", "path": "/note"},
+        {"op": "add", "path": "/a~1b", "value": 1},
+    ])
+    mongo = update.to_mongo(NOW)
+    assert mongo["$set"] == {"profile.age": 31, "a/b": 1, "updated_at": NOW}
+    assert mongo["$unset"] == {"note": ""}
+    assert mongo["$push"] == {
+        "wealth.child_plans": {"$each": [{"scheme_name": "Sukanya"}], "$position": 0},
+        "tags": {"$each": ["c"]},
+    }
+
+    after = apply_update(dict(copy.deepcopy(STORED), wealth={"child_plans": [{"scheme_name": "PPF"}]}, tags=["a", "b"]), mongo)
+    assert after["wealth"]["child_plans"] == [{"scheme_name": "Sukanya"}, {"scheme_name": "PPF"}]
+    assert after["tags"] == ["a", "b", "c"]
+    assert "note" not in after and after["version"] == 4
+
+
+@pytest.mark.parametrize("operations", [
+    [{"op": "move", "from": "/a", "path": "/b"}],
+    [{"op": "remove", "path": "/tags/0"}],
+    [{"op": "add", "path": "/profile"}],
+    [{"op": "replace", "path": "/version", "value": 1}],
+    [{"op": "add", "path": "/tags/0", "value": 1}, {"op": "add", "path": "/tags/-", "value": 2}],
+    {"op": "add"},
+])
+def test_json_patch_rejects_unsupported_operations(operations):
+    with pytest.raises(PatchError):
+        json_patch_update(operations)
+
+
+@pytest.mark.parametrize("operations", [
+    [{"op": "add", "path": "/x", "value": 1}, {"op": "add", "path": "/x/z", "value": 1}],
+    # "x" < "x-y" < "x.z": the parent and child aren't neighbours once sorted
+    [{"op": "add", "path": "/x", "value": 1}, {"op": "add", "path": "/x-y", "value": 1},
+     {"op": "add", "path": "/x/z", "value": 1}],
+    [{"op": "add", "path": "/x", "value": 1}, {"op": "remove", "path": "/x"}],
+])
+def test_conflicting_paths_are_rejected(operations):
+    with pytest.raises(PatchError):
+        json_patch_update(operations).to_mongo(NOW)
+
+
+def test_sibling_paths_sharing_a_prefix_do_not_conflict():
+    update = json_patch_update([
+        {"op": "add", "path": "/x", "value": 1},
+        {"op": "add", "path": "/x-y", "value": 1},
+        {"op": "add", "path": "/xy/z", "value": 1},
+    ])
+    assert set(update.to_mongo(NOW)["$set"]) == {"x", "x-y", "xy.z", "updated_at"}
+
+
+@pytest.mark.parametrize("path,value,expected", [
+    ("/profile/age", 30, True),
+    ("/profile/age", 31, False),
+    ("/rate", 2, True),
+    ("/profile", {"monthly_income": 100000, "age": 30}, True),
+    ("/profile", {"age": 30}, False),
+    ("/tags", ["a", "b"], True),
+    ("/tags", ["b", "a"], False),
+    ("/tags", "a", False),
+    ("/note", None, True),
+    ("/missing", None, False),
+    ("/code", "$x", True),
+    ("/wealth/child_plans/0/scheme_name", "PPF", True),
+    ("/wealth/child_plans/1/scheme_name", "PPF", False),
+    ("/profile/age", True, False),
+    ("/profile/age/0", 30, False),
+])
+def test_json_patch_test_matches_rfc_6902_equality(path, value, expected):
+    update = json_patch_update([{"op": "test", "path": path, "value": value}])
+    assert matching(update.conditions) is expected
+
+
+def test_every_test_operation_must_hold():
+    update = json_patch_update([
+        {"op": "test", "path": "/profile/age", "value": 30},
+        {"op": "test", "path": "/note", "value": "x"},
+    ])
+    assert not matching(update.conditions)
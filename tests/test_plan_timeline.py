@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from benchmarks.bench_api import SAMPLE_PROFILE, in_process_client
+from financial_calculator import FinancialCalculator
+from plan_timeline import RETIREMENT_AGE, iter_ndjson, iter_plan_timeline
+from rate_registry import current_rates
+from serialization import ndjson_line
+
+
+def _timeline(years=20, granularity="year", **profile):
+    profile = {**SAMPLE_PROFILE, **profile}
+    plan = FinancialCalculator.calculate_comprehensive_plan(profile)
+    return plan, list(iter_plan_timeline(profile, plan, years=years, granularity=granularity))
+
+
+def test_mutual_funds_end_at_the_projected_value():
+    plan, rows = _timeline()
+    assert rows[-1]["mutual_funds"] == pytest.approx(plan["wealth"]["mutual_funds"]["projected_value"], rel=1e-6)
+
+
+def test_nps_keeps_compounding_after_retirement():
+    _, rows = _timeline(age=50)
+    retired = [row for row in rows if row["age"] > RETIREMENT_AGE]
+    assert retired
+    yearly_growth = (1 + current_rates()["NPS_EXPECTED_RETURN"] / 12) ** 12
+    # A year of growth and nothing else: contributions have stopped
+    for previous, row in zip(rows, rows[1:]):
+        if previous["age"] >= RETIREMENT_AGE:
+            assert row["nps"] == pytest.approx(previous["nps"] * yearly_growth, rel=1e-6)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 120, 5000])
+def test_ndjson_chunks_hold_every_row_in_order(chunk_rows):
+    _, rows = _timeline(years=30, granularity="month")
+    chunks = list(iter_ndjson(iter(rows), chunk_rows))
+    assert len(chunks) == -(-len(rows) // chunk_rows)
+    assert b"".join(chunks) == b"".join(ndjson_line(row) for row in rows)
+
+
+def test_timeline_route_streams_every_month():
+    async def get():
+        async with in_process_client() as client:
+            return await client.get(
+                "/api/calculate-plan/timeline", params={**SAMPLE_PROFILE, "years": 25, "granularity": "month"}
+            )
+
+    response = asyncio.run(get())
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 25 * 12
@@ -0,0 +1,42 @@
+import asyncio
+
+import httpx
+import pytest
+
+from profiling import ProfilingMiddleware
+
+
+async def _app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _get(middleware, headers):
+    async def get():
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/", headers=headers)
+
+    return asyncio.run(get())
+
+
+@pytest.mark.parametrize("token", [None, ""])
+def test_header_is_ignored_without_a_token(tmp_path, token):
+    response = _get(ProfilingMiddleware(_app, str(tmp_path), token=token), {"X-Profile": "1"})
+    assert "x-profile-id" not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_header_must_match_the_token(tmp_path):
+    middleware = ProfilingMiddleware(_app, str(tmp_path), token="secret")
+    assert "x-profile-id" not in _get(middleware, {"X-Profile": "guess"}).headers
+    assert list(tmp_path.iterdir()) == []
+
+    response = _get(middleware, {"X-Profile": "secret", "X-Request-ID": "req/1"})
+    assert response.headers["x-profile-id"] == "req_1.pstats"
+    assert [path.name for path in tmp_path.iterdir()] == ["req_1.pstats"]
+
+
+def test_sampled_requests_are_profiled_without_a_header(tmp_path):
+    response = _get(ProfilingMiddleware(_app, str(tmp_path), sample_rate=1.0), {})
+    assert "x-profile-id" in response.headers